@@ -1,48 +1,312 @@
 import io
-import copy
+import time
+from collections import deque
 
 
 class Cell:
-    def __init__(self, coord: tuple, assign: int, domain: list,
+    def __init__(self, coord: tuple, assign: int, domain: int,
             constr: list):
         self.coord = coord
         # The coordinates of the cell represented as a tuple
         # e.g. (2, 3) denotes Row 2, Column 3
-        # Row and column numbers range from 0~4 (inclusive)
+        # Row and column numbers range from 0 to (size - 1), where 
+        # size is the number of cells in a row of the board
 
         self.assign = assign
         # The value assigned to the cell, if any
         # = None if the cell is unassigned
 
         self.domain = domain
-        # Represented as a list of integers
+        # Represented as an integer bitset: the value v is in the 
+        # domain if and only if bit v is set, e.g. 0b101010 stands 
+        # for the domain [1, 3, 5]. Bit 0 is never used
+        # = the single bit of the assigned value once the cell has 
+        # been assigned a value
 
         self.constr = constr
         # Constraints of inequality on the cell, represented as
-        # a list of strings
+        # a list of four relations (NO_CONSTR, SMALLER or GREATER), 
+        # one for each neighbor in the up-down-left-right order
+
+        self.index = None
+        # The position of the cell in the flat, row-by-row list of 
+        # all cells on the board, i.e. row * size + column
+        # Set by the Board the cell is placed on
+
+        self.culprits = 0
+        # The decision levels of the search whose assignments have 
+        # narrowed the domain of the cell, as a bitset: bit k is set if 
+        # the assignment made at level k is (directly or through 
+        # propagation) the reason for a value missing from the domain
+
+
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+# The order in which the four neighbors of a cell are listed, both in 
+# the constraint field of the Cell class and in the Topology tables
+
+NO_CONSTR, SMALLER, GREATER = 0, 1, 2
+# The relation between a cell and one of its neighbors: no constraint 
+# (or no neighbor at all), the cell must be smaller than the neighbor, 
+# or the cell must be greater than the neighbor
+
+MRV, DOM_WDEG = 0, 1
+# The heuristics for choosing the next cell to assign (see 
+# select_unassigned_cell)
+
+ASCENDING, LEAST_CONSTRAINING = 0, 1
+# The orders in which the values of the chosen cell are tried (see 
+# order_domain_values)
+
+ALL_DIFFERENT, PAIRWISE = 0, 1
+# How strongly start_fc propagates the rows and columns: as whole 
+# all-different constraints (see propagate_line), or only as the 
+# pairwise "not equal" constraints between their cells, which is 
+# weaker but cheaper
+
+
+class Topology:
+    """ The layout of a size-by-size board, which only depends on the size 
+    of the board and is therefore computed once per size and shared by 
+    every board of that size (see get_topology). All cells are referred 
+    to by their flat index, so that the hot paths of the solver only 
+    index into tuples instead of walking the board move by move."""
+    def __init__(self, size: int):
+        self.size = size
+
+        neighbors = []
+        peers = []
+        for i in range(0, size):
+            for j in range(0, size):
+                neighbors.append((
+                    (i - 1) * size + j if i > 0 else -1,
+                    (i + 1) * size + j if i < size - 1 else -1,
+                    i * size + j - 1 if j > 0 else -1,
+                    i * size + j + 1 if j < size - 1 else -1))
+                # -1 marks a neighbor beyond the boundaries of the board
+
+                peers.append(
+                    tuple(k * size + j for k in range(0, size) if k != i) + 
+                    tuple(i * size + k for k in range(0, size) if k != j))
+                # The other cells in the same column, followed by the 
+                # other cells in the same row
+
+        self.neighbors = tuple(neighbors)
+        # The flat indices of the four neighbors of each cell, in the 
+        # up-down-left-right order
+
+        self.peers = tuple(peers)
+        # The flat indices of all cells that share a row or a column 
+        # with each cell, i.e. that must not take the same value
+
+        self.lines = tuple(
+            tuple(i * size + j for j in range(0, size)) 
+                for i in range(0, size)) + tuple(
+            tuple(i * size + j for i in range(0, size)) 
+                for j in range(0, size))
+        # The flat indices of the cells in each row, followed by those 
+        # in each column: the 2 * size all-different constraints
+
+        self.cell_lines = tuple((index // size, size + index % size) 
+                for index in range(0, size * size))
+        # The numbers of the row and the column (in "lines") of each cell
+
+
+_topologies = {}
+# The Topology objects that have been computed so far, keyed by size
+
+
+def get_topology(size: int) -> Topology:
+    """ Returns the shared Topology object for boards of the given size, 
+    computing it on first use."""
+    if size not in _topologies:
+        _topologies[size] = Topology(size)
+    return _topologies[size]
 
 
 class Board:
-    def __init__(self, all_cells: list, all_constr: list):
+    def __init__(self, all_cells: list, all_constr: list, 
+            heuristic: int = MRV, value_order: int = ASCENDING, 
+            propagation: int = ALL_DIFFERENT):
         self.cells = all_cells
-        # All twenty-five cells on the board, represented as
-        # a five-by-five list
+        # All cells on the board, represented as a size-by-size 
+        # list, e.g. a five-by-five list for a 5x5 puzzle
+
+        self.size = len(all_cells)
+        # The number of rows (and columns) on the board, which is 
+        # also the largest value that can be assigned to a cell
 
         self.constr = all_constr
-        # All constraints of all twenty-five cells, represented as
-        # a five-by-five-by-four list
+        # All constraints of all cells, represented as a 
+        # size-by-size-by-four list
         # The constraints of an individual cell is represented as
-        # a list of four strings, each of which indicates the constraint 
-        # regarding one of the four neighbors
+        # a list of four integers, each of which indicates the 
+        # constraint regarding one of the four neighbors
+
+        self.topology = get_topology(self.size)
+        # The neighbor and peer tables shared by all boards of this size
+
+        self.flat = [a_cell for a_row in all_cells for a_cell in a_row]
+        # All cells on the board in a single row-by-row list, so that 
+        # the flat indices of the Topology tables can be used directly
+        for index in range(len(self.flat)):
+            self.flat[index].index = index
+
+        arcs = []
+        arc_ids = []
+        numbers = {}
+        for index in range(len(self.flat)):
+            a_cell = self.flat[index]
+            cell_arcs = []
+            cell_ids = []
+            for direction in (UP, DOWN, LEFT, RIGHT):
+                relation = a_cell.constr[direction]
+                if relation != NO_CONSTR:
+                    neighbor = self.topology.neighbors[index][direction]
+                    cell_arcs.append((neighbor, relation))
+                    pair = (min(index, neighbor), max(index, neighbor))
+                    if pair not in numbers:
+                        numbers[pair] = 2 * self.size + len(numbers)
+                    cell_ids.append(numbers[pair])
+            arcs.append(tuple(cell_arcs))
+            arc_ids.append(tuple(cell_ids))
+        self.arcs = tuple(arcs)
+        # The inequality constraints of each cell, computed once per 
+        # puzzle: a tuple of (neighbor index, relation) pairs for every 
+        # cell, where the relation is SMALLER if the cell is smaller 
+        # than that neighbor and GREATER if it's greater
+
+        self.arc_ids = tuple(arc_ids)
+        # The number of the constraint behind each arc in self.arcs, 
+        # shared by the two arcs of a sign. The rows and columns take 
+        # the numbers from 0 to 2 * size - 1 (as in Topology.lines), and 
+        # the signs the numbers after that
+
+        self.weights = [1] * (2 * self.size + len(numbers))
+        # The failure weight of every constraint, by number: one plus 
+        # the number of times propagating it has emptied a domain. 
+        # Unlike everything else, the weights are kept on backtracking
+
+        self.heuristic = heuristic
+        # Either MRV or DOM_WDEG (see select_unassigned_cell)
+
+        self.value_order = value_order
+        # Either ASCENDING or LEAST_CONSTRAINING (see order_domain_values)
+
+        self.propagation = propagation
+        # Either ALL_DIFFERENT or PAIRWISE (see start_fc)
+
+        self.buckets = [set() for size in range(0, self.size + 1)]
+        for a_cell in self.flat:
+            if a_cell.assign == None:
+                self.buckets[domain_size(a_cell.domain)].add(a_cell.index)
+        # The flat indices of the unassigned cells, grouped by the number 
+        # of values left in their domains: buckets[k] holds the cells 
+        # with k values. set_domain, set_assign and undo move the cells 
+        # between the buckets as their domains change, so that the 
+        # search never has to scan the whole board for the cell with 
+        # the fewest remaining values
+
+        self.trail = []
+        # The undo log of the board: every change made to a cell's 
+        # assignment or domain through set_assign or set_domain first 
+        # pushes the cell's previous state onto this list as a tuple 
+        # (cell, assign, domain, culprits), so that undo can restore it 
+        # later
+
+        self.conflict = 0
+        # The culprits (see the Cell class) of the last failure found by 
+        # start_fc, i.e. the decision levels that together caused it
+
+        self.decisions = []
+        # The (cell index, value) assignment made at each level of the 
+        # search that is currently under way, level 1 first
+
+        self.nogoods = {}
+        # The combinations of assignments that the search has proven to 
+        # lead to no solution, each a tuple of (cell index, value) pairs, 
+        # listed under every pair they contain
+
+        self.nodes = 0
+        # The number of assignments the search has made on this board, 
+        # i.e. the number of nodes of the search tree it has expanded
+
+        self.budget = None
+        # The node count at which the search stops, if any. Every level 
+        # then lists its untried values in self.frontier and returns 
+        # without trying them
+
+        self.frontier = []
+        # The subtrees left unexplored by a search that has run out of 
+        # budget, each as the list of (cell index, value) assignments 
+        # that lead to it, level 1 first
+
+        self.stats = None
+        # The SearchStats object that the search and the propagation 
+        # report to, if any. Everything but the node count above is 
+        # only measured when there's one
+
+        self.hooks = None
+        # The SearchHooks object whose methods are called as the search 
+        # goes on, if any
+
+    """ The following three methods are the only places where the search 
+    modifies a cell. Recording the previous state of each modified cell 
+    makes the cost of backtracking proportional to what actually changed 
+    rather than to the size of the board."""
+    def set_domain(self, a_cell: Cell, domain: int, 
+            culprits: int = 0) -> None:
+        if a_cell.domain != domain:
+            # Only record the change if the domain actually shrank
+            self.trail.append((a_cell, a_cell.assign, a_cell.domain, 
+                a_cell.culprits))
+            if a_cell.assign == None:
+                self.buckets[domain_size(a_cell.domain)].discard(
+                        a_cell.index)
+                self.buckets[domain_size(domain)].add(a_cell.index)
+            a_cell.domain = domain
+            a_cell.culprits |= culprits
+            # The culprits of the cells whose domains caused the change
+
+
+    def set_assign(self, a_cell: Cell, value: int, 
+            culprits: int = 0) -> None:
+        self.trail.append((a_cell, a_cell.assign, a_cell.domain, 
+            a_cell.culprits))
+        if a_cell.assign == None:
+            self.buckets[domain_size(a_cell.domain)].discard(a_cell.index)
+        a_cell.assign = value
+        a_cell.domain = 1 << value
+        a_cell.culprits = culprits
+        # The domain now depends on this assignment alone
+
+
+    def undo(self, mark: int) -> None:
+        """ Pops the trail until its length is back to "mark", restoring 
+        every recorded cell to its earlier state along the way. "mark" is 
+        obtained from len(self.trail) before the changes were made."""
+        trail = self.trail
+        while len(trail) > mark:
+            a_cell, assign, domain, culprits = trail.pop()
+            if a_cell.assign == None:
+                self.buckets[domain_size(a_cell.domain)].discard(
+                        a_cell.index)
+            if assign == None:
+                self.buckets[domain_size(domain)].add(a_cell.index)
+            a_cell.assign = assign
+            a_cell.domain = domain
+            a_cell.culprits = culprits
+
 
     """ The following are four methods that, when given one of the Cell 
     objects on the board, return one of its neighbors. If moving in 
     the particular direction (left, right, etc.) goes beyond the 
-    boundaries of the board, each of the methods raises a ValueError."""    
+    boundaries of the board, each of the methods raises a ValueError. 
+    The solver itself looks neighbors up in the Topology tables instead, 
+    which never raise."""    
     def go_left(self, origin: Cell) -> Cell:
         row = origin.coord[0]
         col = origin.coord[1] - 1
-        if (0 <= col <= 4):
+        if (0 <= col < self.size):
             return self.cells[row][col]
             # If the move is within the boundaries of the board,
             # return the destination as a Cell object
@@ -56,7 +320,7 @@ class Board:
     def go_right(self, origin: Cell) -> Cell:
         row = origin.coord[0]
         col = origin.coord[1] + 1
-        if (0 <= col <= 4):
+        if (0 <= col < self.size):
             return self.cells[row][col]
         else:
             raise ValueError()
@@ -65,7 +329,7 @@ class Board:
     def go_up(self, origin: Cell) -> Cell:
         row = origin.coord[0] - 1
         col = origin.coord[1]
-        if (0 <= row <= 4):
+        if (0 <= row < self.size):
             return self.cells[row][col]
         else:
             raise ValueError()
@@ -74,239 +338,597 @@ class Board:
     def go_down(self, origin: Cell) -> Cell:
         row = origin.coord[0] + 1
         col = origin.coord[1]
-        if (0 <= row <= 4):
+        if (0 <= row < self.size):
             return self.cells[row][col]
         else:
             raise ValueError()
 
 
+class SearchStats:
+    """ Counters describing the work done by the solver, for finding out 
+    why a puzzle is slow. Pass one to solve, iter_solutions, 
+    count_solutions or has_unique_solution (or to the parallel, 
+    portfolio and SAT solvers of the other modules) to have it filled; 
+    the counters of several solves passed the same object add up. 
+    Without one, the solver measures nothing beyond Board.nodes, and 
+    costs no more than a comparison with None per call of start_fc and 
+    per search node."""
+
+    def __init__(self):
+        self.nodes = 0
+        # The assignments made by the search, i.e. the nodes expanded
+
+        self.rejected = 0
+        # The values rejected by is_consistent before being assigned
+
+        self.nogood_hits = 0
+        # The values skipped because they'd complete a recorded nogood
+
+        self.backjumps = 0
+        # The levels that conflict-directed backjumping has skipped, 
+        # i.e. left without trying their remaining values
+
+        self.max_depth = 0
+        # The deepest level of the search, i.e. the largest number of 
+        # cells assigned by the search at the same time
+
+        self.propagations = 0
+        # The calls of start_fc, the initial propagation included
+
+        self.fc_calls = 0
+        # The calls of forward_checking, i.e. the cells taken off the 
+        # work queue of start_fc
+
+        self.rounds = 0
+        # The fixed-point iterations of start_fc: the times the arc 
+        # revisions have been run until the work queue was empty, each 
+        # followed by propagate_line on one line
+
+        self.wipeouts = 0
+        # The calls of start_fc that failed, i.e. emptied a domain or 
+        # found a line whose cells can't take distinct values
+
+        self.solutions = 0
+        # The solutions found
+
+        self.propagate_seconds = 0.0
+        # The time spent in start_fc
+
+        self.select_seconds = 0.0
+        # The time spent choosing the next cell and ordering its values
+
+        self.undo_seconds = 0.0
+        # The time spent undoing assignments and their propagation on 
+        # backtracking, which is what restoring the board costs now that 
+        # the search no longer copies it
+
+        self.seconds = 0.0
+        # The total time spent by the solver, including the setup of 
+        # the board
+
+
+    def as_dict(self) -> dict:
+        """ Returns the counters as a dictionary, e.g. for logging them 
+        as JSON."""
+        return dict(vars(self))
+
+
+    def add(self, other) -> None:
+        """ Adds the counters of another SearchStats object, e.g. one 
+        filled in a worker process, to these. The deepest level is the 
+        deeper of the two rather than their sum."""
+
+        for name, value in vars(other).items():
+            if name == "max_depth":
+                self.max_depth = max(self.max_depth, value)
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+
+class SearchHooks:
+    """ The base class of callbacks into the solver, for tracing or 
+    profiling it. Pass an object of a subclass to solve, iter_solutions 
+    or count_solutions, overriding the methods for the events of 
+    interest; the methods here do nothing. "level" is the level of the 
+    search as in the search function, i.e. the number of cells assigned 
+    by the search so far plus one. Without hooks, the solver costs no 
+    more than a comparison with None per event."""
+
+    def on_start(self, a_board: Board) -> None:
+        """ Called once the board has been set up, before the initial 
+        propagation."""
+
+    def on_node_enter(self, a_board: Board, level: int) -> None:
+        """ Called when the search enters a level, before it chooses the 
+        cell to assign there."""
+
+    def on_assign(self, a_board: Board, level: int, a_cell: Cell, 
+            value: int) -> None:
+        """ Called when the search has assigned the value to the cell, 
+        before the assignment is propagated."""
+
+    def on_wipeout(self, a_board: Board, a_cell: Cell) -> None:
+        """ Called when propagation fails, i.e. start_fc has emptied a 
+        domain or found a line whose cells can't take distinct values; 
+        a_board.conflict holds the culprits. "a_cell" is the cell whose 
+        assignment was being propagated, or None for the initial 
+        propagation."""
+
+    def on_solution(self, a_board: Board) -> None:
+        """ Called when the assignment on the board is complete, before 
+        the solution is handed to the caller."""
+
+    def on_node_exit(self, a_board: Board, level: int, 
+            conflict: int) -> None:
+        """ Called when the search leaves a level, having undone its 
+        assignments, with the conflict set it returns (see search)."""
+
+
+""" The following functions operate on the integer bitsets that represent 
+the domains of the cells. Each of them is a handful of bit operations, 
+so that shrinking or inspecting a domain never allocates a list."""
+def full_domain(size: int) -> int:
+    """ Returns the domain that contains every value from 1 to size."""
+    return ((1 << size) - 1) << 1
+
+
+def domain_size(domain: int) -> int:
+    """ Returns the number of values in the domain (its popcount)."""
+    return bin(domain).count("1")
+
+
+def domain_min(domain: int) -> int:
+    """ Returns the smallest value in a non-empty domain. (domain & -domain) 
+    isolates the lowest set bit."""
+    return (domain & -domain).bit_length() - 1
+
+
+def domain_max(domain: int) -> int:
+    """ Returns the largest value in a non-empty domain."""
+    return domain.bit_length() - 1
+
+
+def domain_values(domain: int) -> list:
+    """ Returns the values in the domain as a list in ascending order."""
+    values = []
+    while domain:
+        lowest = domain & -domain
+        values.append(lowest.bit_length() - 1)
+        domain ^= lowest
+    return values
+
+
+def values_above(value: int) -> int:
+    """ Returns the mask of all values greater than the given value. The 
+    mask is a negative integer (i.e. infinitely many set bits), which is 
+    harmless since it's only ever combined with a domain by "&"."""
+    return -1 << (value + 1)
+
+
+def values_below(value: int) -> int:
+    """ Returns the mask of all values from 1 up to, but excluding, the 
+    given value."""
+    return (1 << value) - 2
+
+
 def load_input(filename: str) -> list:
-    """ Given the name of the input file, the function reads the file line by 
-    line and builds the data structures for the initial state as well as the 
-    constraints of inequality."""
+    """ Given the name of the input file, the function opens the file and 
+    passes it on to read_input, which builds the data structures for the 
+    initial state as well as the constraints of inequality."""
     
     text_stream = io.open(filename, 'r', encoding='utf-8', 
             errors='ignore', newline='\n')
     """ Calls Python's io function to read the file with the specified name."""
 
-    initial_state = []
-    for i in range(0,5):
+    ret = read_input(text_stream)
+    text_stream.close()
+    # By this point, reading the input file has concluded
+    return ret
+
+
+def parse_input(text: str) -> list:
+    """ The same as load_input, only that the puzzle is given as a string 
+    in the format of the input files rather than as a filename."""
+    return read_input(io.StringIO(text))
+
+
+def read_input(text_stream: io.TextIOBase) -> list:
+    """ Given a text stream positioned at the start of a puzzle, the function 
+    reads the stream line by line and builds the data structures for the 
+    initial state as well as the constraints of inequality. The size of the 
+    board is inferred from the number of values on the first line, so the 
+    same format covers 4x4, 5x5, 9x9 and larger puzzles."""
+
+    initial_state = [list(map(int, 
+        text_stream.readline().split()))]
+    size = len(initial_state[0])
+    # The first row of the initial state determines the size of the 
+    # board; every other part of the file is read relative to it
+
+    for i in range(1, size):
         initial_state.append(list(map(int, 
-            text_stream.readline().rstrip().split(' '))))
-        """ The rstrip method removes all trailing white space of 
-        the string. The split method uses the given character as the 
-        delimiter to break down the string and return a list of the 
-        substrings. The map function takes that list, converts the 
+            text_stream.readline().split())))
+        """ Without an argument, the split method breaks down the 
+        string at any run of white space (ignoring leading and 
+        trailing white space, including a "\r" at the end of the 
+        line) and returns a list of the substrings. The map function takes that list, converts the 
         substrings into integers and returns a map object, which is 
         eventually converted into a list by the exterior call to the 
         list function."""
 
         """ A state is represented as a multi-layer list. The first 
-        layer contains the five rows, each of which contains a 
-        second layer that consists of five cells."""
+        layer contains the rows, each of which contains a second 
+        layer that consists of the cells in that row."""
 
     blank_line = text_stream.readline()
 
     """ In the input file, there is a blank line following the 
-    first five lines, after which begin the next five lines 
-    that represent the horizontal constraints."""
+    first block of lines, after which begin the next block of 
+    lines that represent the horizontal constraints."""
 
-    constr = []
-    """ The constraints from the input file will be 
-    converted to a specific text format and stored in this 
-    list."""
+    horizontal = []
+    for i in range(0, size):
+        horizontal.append(text_stream.readline().split())
+        """ The functions and methods used in this line are 
+        identical to the ones in the previous for loop. Each 
+        element of "horizontal" is a list of the characters that 
+        represent the constraints in a row. """
 
+    """ The input file contains another blank line, followed by the 
+    last size - 1 lines, which illustrate the constraints for 
+    vertically-adjacent cells."""
 
-    for i in range(0,5):
-        a_row = []
-        # A list that stores the constraints of all cells
-        # in a single row
-        for j in range(0,5):
-            a_row.append(['U', 'D', 'L', 'R'])
-            """ Each row in the list "constr" contains
-            five lists, one for each of the five cells 
-            in a row. Each sublist stores the constraints 
-            in four directions that relate to the 
-            particular cell: its relation with the cell 
-            above ('U'), the cell below ('D'), the cell 
-            to the left ('L'), and the cell to the 
-            right ('R'). 'U', 'D', 'L' and 'R' 
-            are four strings that function as placeholders 
-            for now. Afterward they'll be modified to 
-            indicate the exact relations between each pair.
-            """
-            if i == 0:
-                a_row[j][0] = "N/A"
-                """ For all cells in the first row, the 
-                first element in their lists is replaced 
-                with "N/A", since there are no cells 
-                above them."""
-            elif i == 4:
-                a_row[j][1] = "N/A"
-                """ By the same token, the second element 
-                in the lists of all cells in the last row 
-                is replaced with "N/A"."""
-
-            if j == 0:
-                a_row[j][2] = "N/A"
-                """ For all cells in the first column,
-                the third element in their lists is 
-                replaced with "N/A", since there are no 
-                cells to their left."""
-            elif j == 4:
-                a_row[j][3] = "N/A"
-                """ By the same token, the fourth element 
-                in the lists of all cells in the last 
-                column is replaced with "N/A"."""
-
-        constr.append(a_row)
-        """ Now that the proper placeholders have been 
-        inserted into the list of a single row, append 
-        the row to the list "constr"."""
-
-    """ By this point "constr" has been formatted as:
-
-    1st layer: five lists, each referring to a row on 
-    the Fukushiki board.
+    blank_line = text_stream.readline()
+    # Move the read cursor past the blank line.
+
+    vertical = []
+    for i in range(0, size - 1):
+        # This part of the input file contains one row fewer than 
+        # the board, e.g. only four rows for a 5x5 board
+        vertical.append(text_stream.readline().split())
+
+    ret = [initial_state, build_constr(size, horizontal, vertical)]
+    # Returns the two lists that represent the initial state and 
+    # all constraints, respectively
+    return ret
+
+
+def build_constr(size: int, horizontal: list, vertical: list) -> list:
+    """ Converts the constraint rows of a puzzle into the list of 
+    constraints of all cells. "horizontal" holds one list per row of the 
+    board with the size - 1 characters ('0', '<' or '>') between the 
+    horizontally-adjacent cells of that row, and "vertical" holds one 
+    list per pair of adjacent rows with the size characters ('0', '^' or 
+    'v') between the vertically-adjacent cells."""
+
+    no_constr = [NO_CONSTR] * 4
+    constr = [[no_constr[:] for j in range(0, size)] for i in range(0, size)]
+    """ The constraints will be converted to small integers and stored 
+    in this list, which is formatted as:
+
+    1st layer: one list for each row on the Futoshiki board.
     
-    2nd layer: this is within each list in the 1st 
-    layer. There are five lists, each refering to a 
-    cell in the particular row.
-
-    3rd layer: this is within each list in 2nd layer. 
-    There are four strings, each referring to the 
-    relation between the current cell and the four 
-    neighboring cells: the one above ('U'), the 
-    one below ('D'), the one to the left ('L'), 
-    and the one to the right ('R'). These strings 
-    will be modified afterward to indicate the 
-    exact relations."""
-
-
-    """ The following for loop reads the next five lines, which 
-    contain the constraints between horizontally-adjacent 
-    cells."""
-
-    for i in range(0, 5):
-        line = list(map(str, text_stream.readline().rstrip().split(' ')))
-        """ The functions and methods used in this line are 
-        identical to the ones in the previous for loop. "line"
-        is a list of the four characters that represent the 
-        constraints in the row. """
+    2nd layer: this is within each list in the 1st layer. There is 
+    one list for each cell in the particular row.
+
+    3rd layer: this is within each list in 2nd layer. There are four 
+    integers, each referring to the relation between the current cell 
+    and one of its neighbors, in the up-down-left-right order (see UP, 
+    DOWN, LEFT and RIGHT). Every relation starts out as NO_CONSTR and 
+    is set to SMALLER or GREATER below if the puzzle says so. Cells on 
+    the edges of the board simply keep NO_CONSTR for the neighbors 
+    they don't have."""
+
+    for i in range(len(horizontal)):
+        line = horizontal[i]
+        if '<' not in line and '>' not in line:
+            continue
+            # Most lines carry no constraint at all
 
         for j in range(len(line)):
-            # len(line) is expected to be 4 (four constraints in 
-            # a row)
-            if line[j] == '0':
-                constr[i][j][3] = "None"
-                constr[i][j+1][2] = "None"
-                """ For instance, if j = 0, and line[j] = 0, 
-                that indicates there's no constraint between 
-                the first and second cells of the row. 
-                Therefore, modify the fourth element of the 
-                first cell, which stores the current cell's 
-                relation with the cell on the right; replace 
-                'R' with "None", since there's no constraint. 
-                By the same token, replace the third element 
-                of the second cell with "None"."""
-
-            elif line[j] == '>':
-                constr[i][j][3] = "GTR"
-                constr[i][j+1][2] = "STL"
+            # len(line) is expected to be size - 1 (e.g. four 
+            # constraints in a row of a 5x5 board)
+            # '0' indicates there's no constraint between the two 
+            # cells, which leaves both relations as NO_CONSTR
+
+            if line[j] == '>':
+                constr[i][j][RIGHT] = GREATER
+                constr[i][j+1][LEFT] = SMALLER
                 """ For instance, if j = 0, and line[j] = '>', 
                 that indicates the first cell of the row has 
                 to be greater than the second cell. Therefore, 
-                modify the fourth element of the first cell, 
-                which stores the current cell's relation with 
-                the cell on the right; replace 'R' with "GTR", 
-                which stands for "Greater Than Right". By the 
-                same token, replace the third element of the 
-                second cell with "STL", which stands for 
-                "Smaller Than Left"."""
+                the relation of the first cell with the cell on 
+                its right becomes GREATER. By the same token, 
+                the relation of the second cell with the cell 
+                on its left becomes SMALLER."""
 
             elif line[j] == '<':
-                constr[i][j][3] = "STR"
-                constr[i][j+1][2] = "GTL"
+                constr[i][j][RIGHT] = SMALLER
+                constr[i][j+1][LEFT] = GREATER
                 """ The same notation as above, only that the 
                 relation is one being smaller than the other."""
 
-    """ By the end of the double-layer for loop, all constraints 
-    for horizontally-adjacent cells have been read and stored. 
-    The input file contains another blank line, followed by the 
-    last four lines, which illustrate the constraints for 
-    vertically-adjacent cells."""
-
-    blank_line = text_stream.readline()
-    # Move the read cursor past the blank line.
-
-    for i in range(0, 4):
-        # range = (0,4) because this part of the input file contains 
-        # only four rows
-        
-        line = list(map(str, text_stream.readline().rstrip().split(' ')))
-        # Contains the same methods as previously explained
-        # "line" is a list that contains the four characters that 
-        # represent the constraints in a column
+    for i in range(len(vertical)):
+        line = vertical[i]
+        if '^' not in line and 'v' not in line:
+            continue
 
         for j in range(len(line)):
-            # len(line) is expected to be 5, since there are five 
-            # characters in each line of this part of the input
-
-            if line[j] == '0':
-                constr[i][j][1] = "None"
-                constr[i+1][j][0] = "None"
-                """ 0 indicates there's no constraint, so the second 
-                element of the cell (i, j), which refers to its 
-                relation with the cell underneath it, should be 
-                "None". By the same token, the first element 
-                of the cell (i+1, j) should be "None" as well."""
-
-            elif line[j] == '^':
-                constr[i][j][1] = "STD"
-                constr[i+1][j][0] = "GTU"
-                # STD = Smaller Than Down
-                # GTU = Greater Than Up
-
-            elif line[j] == 'v':
-                constr[i][j][1] = "GTD"
-                constr[i+1][j][0] = "STU"
-                # GTD = Greater Than Down
-                # STU = Smaller Than Up
+            # len(line) is expected to be size, since there is one 
+            # character per column in this part of the input
 
-    text_stream.close()
-    # By this point, reading the input file has concluded
+            if line[j] == '^':
+                constr[i][j][DOWN] = SMALLER
+                constr[i+1][j][UP] = GREATER
+                # The cell (i, j) is smaller than the cell below it, 
+                # and the cell (i+1, j) is greater than the one above
 
-    ret = [initial_state, constr]
-    # Returns the two lists that represent the initial state and 
-    # all constraints, respectively
-    return ret
+            elif line[j] == 'v':
+                constr[i][j][DOWN] = GREATER
+                constr[i+1][j][UP] = SMALLER
+
+    return constr
+
+
+def format_input(initial_state: list, constr: list) -> str:
+    """ The reverse of parse_input: returns the puzzle given by the initial 
+    state and the list of constraints as a string in the format of the 
+    input files."""
+
+    size = len(initial_state)
+    lines = []
+    for a_row in initial_state:
+        lines.append(' '.join(map(str, a_row)))
+    lines.append('')
+
+    for i in range(0, size):
+        line = []
+        for j in range(0, size - 1):
+            if constr[i][j][RIGHT] == GREATER:
+                line.append('>')
+            elif constr[i][j][RIGHT] == SMALLER:
+                line.append('<')
+            else:
+                line.append('0')
+        lines.append(' '.join(line))
+    lines.append('')
+
+    for i in range(0, size - 1):
+        line = []
+        for j in range(0, size):
+            if constr[i][j][DOWN] == SMALLER:
+                line.append('^')
+            elif constr[i][j][DOWN] == GREATER:
+                line.append('v')
+            else:
+                line.append('0')
+        lines.append(' '.join(line))
+
+    return '\n'.join(lines) + '\n'
+
+
+class PuzzleFormatError(ValueError):
+    """ Raised for (or, by parse_puzzles, collected for) a puzzle that 
+    can't be read. Besides the message, it records which puzzle of the 
+    file failed and on which line, so that one bad puzzle in a large 
+    corpus can be found and fixed without re-reading the rest."""
+    def __init__(self, message: str, number: int, name: str, line: int):
+        super().__init__("puzzle " + str(number) + " (" + name + "), line " 
+                + str(line) + ": " + message)
+        self.detail = message
+        # The description of the problem on its own
+
+        self.number = number
+        # The position of the puzzle in the file, starting from 1
+
+        self.name = name
+        # The name given by the puzzle's header line, if any
+
+        self.line = line
+        # The line of the file on which the problem was found
+
+
+def load_puzzles(filename: str) -> tuple:
+    """ Reads a file that contains any number of puzzles (see 
+    parse_puzzles) in one go and returns the same tuple as 
+    parse_puzzles."""
+
+    with io.open(filename, 'r', encoding='utf-8', errors='ignore') as in_file:
+        text = in_file.read()
+    return parse_puzzles(text)
+
+
+def parse_puzzles(text: str) -> tuple:
+    """ Parses a string that contains any number of puzzles in the format 
+    of the input files. The three blocks of a puzzle (the initial state, 
+    the horizontal constraints and the vertical constraints) are separated 
+    by blank lines as usual, and so are the puzzles themselves. A puzzle 
+    may also be preceded by a header line starting with '#', whose text 
+    becomes the name of the puzzle (puzzles without a header are named 
+    "puzzle 1", "puzzle 2" and so on). Values may be separated by any 
+    amount of white space, and trailing white space or "\\r" characters 
+    are ignored. Since the size of a puzzle is known from its first line, 
+    a missing blank line within a puzzle is tolerated as well: a block 
+    whose length is exactly that of the next two or three blocks of the 
+    puzzle is split into them. Any other block counts as one block, 
+    however long it is, so a puzzle always ends after its third block 
+    (or at a header line) and a malformed block only fails its own 
+    puzzle.
+
+    The whole string is parsed in a single pass. Returns a tuple of two 
+    lists: the puzzles that were read, each as a list [name, initial_state, 
+    constr] in the format returned by load_input, and a PuzzleFormatError 
+    for every puzzle that couldn't be read. A bad puzzle doesn't stop the 
+    parsing of the puzzles after it."""
+
+    puzzles = []
+    errors = []
+    blocks = []
+    # The blocks of the puzzle being read
+    name = None
+    size = 0
+
+    def finish_puzzle() -> None:
+        """ Converts the collected blocks into a puzzle, or an error."""
+        number = len(puzzles) + len(errors) + 1
+        puzzle_name = name if name != None else "puzzle " + str(number)
+        try:
+            [initial_state, constr] = parse_blocks(blocks)
+            puzzles.append([puzzle_name, initial_state, constr])
+        except PuzzleFormatError as error:
+            errors.append(PuzzleFormatError(error.detail, number, 
+                puzzle_name, error.line))
+
+    for header, block in split_blocks(text):
+        if header != None:
+            # A header line ends the puzzle before it, if any, and 
+            # names the next one
+            if blocks:
+                finish_puzzle()
+                blocks = []
+            name = header
+            continue
 
+        if not blocks:
+            size = len(block[0][1])
+        wanted = [size, size, size - 1][len(blocks):]
+        # The number of lines of each block still to come
+        for count in range(2, len(wanted) + 1):
+            if len(block) == sum(wanted[:count]):
+                for length in wanted[:count]:
+                    blocks.append(block[:length])
+                    block = block[length:]
+                break
+        else:
+            blocks.append(block)
+            # Either the expected length, or a malformed block that 
+            # parse_blocks will report
+
+        if len(blocks) == 3:
+            finish_puzzle()
+            blocks = []
+            name = None
+
+    if blocks:
+        finish_puzzle()
+        # The text ended in the middle of a puzzle
+
+    return (puzzles, errors)
+
+
+def split_blocks(text: str):
+    """ A generator that works with parse_puzzles: it walks through the 
+    lines of the text once and yields a tuple (header, block) for every 
+    header line and every block of non-blank lines. For a header line, 
+    "header" is the text after the '#' and "block" is None; otherwise 
+    "header" is None and "block" is a list of (line number, list of 
+    values) pairs."""
+
+    block = []
+    line_number = 0
+    for line in text.splitlines():
+        line_number += 1
+        values = line.split()
+
+        if not values or values[0].startswith('#'):
+            # A blank line or a header line ends the current block
+            if block:
+                yield (None, block)
+                block = []
+            if values:
+                yield (line.strip()[1:].strip(), None)
+            continue
 
-def initialize_board(initial_state: list, constr: list) -> Board:
-    """ The parameters are the initial state, represented as a five-by-five 
-    list, and the list of constraints for all twenty-five cells. The function 
-    instantiates twenty-five Cell objects with the given data and returns 
-    a Board object."""
+        block.append((line_number, values))
+
+    if block:
+        yield (None, block)
+
+
+def parse_blocks(blocks: list) -> list:
+    """ Works with parse_puzzles: converts the three blocks of one puzzle 
+    into the initial state and the list of constraints. Raises a 
+    PuzzleFormatError (whose number and name are filled in by the caller) 
+    when the blocks don't fit together."""
+
+    if len(blocks) != 3:
+        raise PuzzleFormatError("the puzzle ended after " + 
+                str(len(blocks)) + " of its 3 blocks", 0, "", 
+                blocks[-1][-1][0])
+
+    size = len(blocks[0][0][1])
+    # The first row of the initial state determines the size of the 
+    # board, just like in read_input
+    expected = [(size, size), (size, size - 1), (size - 1, size)]
+    # The number of lines of each block, and of values on each line
+    what = ["initial state", "horizontal constraints", 
+            "vertical constraints"]
+    allowed = [None, {'0', '<', '>'}, {'0', '^', 'v'}]
+
+    for k in range(0, 3):
+        if len(blocks[k]) != expected[k][0]:
+            raise PuzzleFormatError("the " + what[k] + " should have " + 
+                    str(expected[k][0]) + " lines, found " + 
+                    str(len(blocks[k])), 0, "", blocks[k][-1][0])
+        for line_number, values in blocks[k]:
+            if len(values) != expected[k][1]:
+                raise PuzzleFormatError("the " + what[k] + " should have " + 
+                        str(expected[k][1]) + " values per line, found " + 
+                        str(len(values)), 0, "", line_number)
+            if allowed[k] != None and not allowed[k].issuperset(values):
+                raise PuzzleFormatError("unexpected character '" + 
+                        min(set(values) - allowed[k]) + "' in the " + 
+                        what[k], 0, "", line_number)
 
+    initial_state = []
+    for line_number, values in blocks[0]:
+        try:
+            a_row = list(map(int, values))
+        except ValueError:
+            raise PuzzleFormatError("the initial state should only " + 
+                    "contain numbers", 0, "", line_number)
+        if min(a_row) < 0 or max(a_row) > size:
+            raise PuzzleFormatError("the values of a board of size " + 
+                    str(size) + " range from 1 to " + str(size) + 
+                    " (0 for an empty cell)", 0, "", line_number)
+        initial_state.append(a_row)
+
+    horizontal = [values for line_number, values in blocks[1]]
+    vertical = [values for line_number, values in blocks[2]]
+    return [initial_state, build_constr(size, horizontal, vertical)]
+
+
+def initialize_board(initial_state: list, constr: list, 
+        heuristic: int = MRV, value_order: int = ASCENDING, 
+        propagation: int = ALL_DIFFERENT) -> Board:
+    """ The parameters are the initial state, represented as a size-by-size 
+    list, and the list of constraints for all cells. The function 
+    instantiates one Cell object per cell with the given data and returns 
+    a Board object, which will be searched with the given heuristic, 
+    order of values and level of propagation."""
+
+    size = len(initial_state)
     all_cells = []
-    # Will become a five-by-five list by the end of function
+    # Will become a size-by-size list by the end of function
     # All Cell objects to be instantiated will be appended 
     # to this list, which is then used to instantiate the 
     # Board object
 
-    for i in range(0,5):
+    for i in range(0, size):
         a_row = []
-        for j in range(0,5):
+        for j in range(0, size):
             assign = initial_state[i][j]
-            domain = [1, 2, 3, 4, 5]
-            # The initial domain of an empty cell
+            domain = full_domain(size)
+            # The initial domain of an empty cell, e.g. the values 
+            # [1, 2, 3, 4, 5] on a 5x5 board
 
             if assign == 0:
                 assign = None
                 # Zero indicates an empty cell
             else:
-                domain = None
-                # Domain doesn't apply to assigned cells
+                domain = 1 << assign
+                # The domain of an assigned cell consists of its 
+                # assigned value only
 
             a_row.append(Cell((i, j), assign, domain, constr[i][j]))
             # Instantiates the Cell object and appends it to the 
@@ -314,399 +936,465 @@ def initialize_board(initial_state: list, constr: list) -> Board:
 
         all_cells.append(a_row)
 
-    # At this point all_cells is a five-by-five list that 
-    # contains all twenty-five cells
+    # At this point all_cells is a size-by-size list that 
+    # contains all cells on the board
 
-    return Board(all_cells, constr)
+    return Board(all_cells, constr, heuristic, value_order, propagation)
 
 
-def forward_checking(a_board: Board, a_cell: Cell, explored: set) -> int:
-    """ Conducts forward checking for the given assigned cell to 
-    ensure there's no other cell in the same row or column with 
-    the same assignment. Also reduces each neighbor's domain to 
-    comply with the constraints, if any. Recursive calls to 
-    itself are made to eventually check every cell on the board 
-    for arc consistency."""
+def calc_degree(a_board: Board, origin: Cell) -> int:
+    """ The function takes a Board object and a Cell object as its 
+    parameters and returns the degree of the given cell, which 
+    equals the number of constraints the cell has regarding its 
+    **unassigned** neighbors."""
 
-    """ The four methods of the Board class--go_up, go_down, go_left 
-    and go_right--all throw a ValueError when the move goes beyond 
-    the board's boundaries. These errors are caught in the except 
-    statements below, and the respective variables are set as 
-    None. If the move is legit, the method returns the destination 
-    as a Cell object, and the corresponding variable (left, right 
-    etc.) is turned into a reference (shallow copy) to that Cell."""
+    degree = 0
+    for neighbor, relation in a_board.arcs[origin.index]:
+        if a_board.flat[neighbor].assign == None: degree += 1
 
-    if a_cell.coord in explored:
-        return 0
-    else:
-        explored.add(a_cell.coord)
+    return degree
 
-    if a_cell.domain != None:
-        if len(a_cell.domain) == 0: return 1
 
-    # Some of the recursive calls may encounter cases where the 
-    # domain of the origin cell has been reduced to none, which 
-    # indicates that there's no solution and that the program 
-    # should halt. This if statement is written at the very 
-    # beginning so that the recursive call could be termianted 
-    # immediately if this were the case.
+def forward_checking(a_board: Board, a_cell: Cell, queue: deque, 
+        queued: set) -> int:
+    """ Revises every arc that points at the given cell, i.e. the domain 
+    of every cell that shares a constraint with it is reduced to the 
+    values that still have a support in the given cell's domain. Cells 
+    whose domains shrink are appended to the work queue "queue" (unless 
+    they're already waiting in it, which "queued" keeps track of), since 
+    the arcs that point at them now need revising in turn. Returns 1 as 
+    soon as a domain is reduced to none and 0 otherwise."""
+
+    domain = a_cell.domain
+    revisions = []
+    # A list of (cell, mask) pairs: the domain of each cell will be 
+    # reduced to the values that are also in its mask
+
+    cells = a_board.flat
+    if domain & (domain - 1) == 0:
+        # The domain consists of a single value (the cell has been 
+        # assigned a value, or only one value is left), which has to 
+        # be removed from the domains of all other cells in the same 
+        # row or column. Removing a single bit is the only pruning 
+        # the "not equal" constraints can ever make.
+        for peer in a_board.topology.peers[a_cell.index]:
+            revisions.append((cells[peer], ~domain))
+
+    """ The inequality arcs are revised against the bounds of the given 
+    cell's domain whether or not it has been assigned a value, and every 
+    neighbor whose bound moves is queued in turn, so the bounds travel 
+    along a whole chain before any cell on it is assigned: on an empty 
+    NxN board, the head of the chain a < b < c < d is held to at most 
+    N - 3 and its tail to at least 4."""
+    for neighbor, relation in a_board.arcs[a_cell.index]:
+        if relation == SMALLER:
+            # The cell is smaller than this neighbor, so the neighbor 
+            # must be greater than the smallest value left in the cell
+            revisions.append((cells[neighbor], 
+                values_above(domain_min(domain))))
+        else:
+            # The cell is greater than this neighbor, so the neighbor 
+            # must be smaller than the largest value left in the cell
+            revisions.append((cells[neighbor], 
+                values_below(domain_max(domain))))
+
+    culprits = a_cell.culprits
+    for position in range(len(revisions)):
+        target, mask = revisions[position]
+        new_domain = target.domain & mask
+        if new_domain != target.domain:
+            a_board.set_domain(target, new_domain, culprits)
+            if new_domain == 0:
+                a_board.conflict = target.culprits
+                blame_revision(a_board, a_cell, target, 
+                        position - len(revisions) + len(
+                            a_board.arcs[a_cell.index]))
+                return 1
+                # The target's domain has been reduced to none, which 
+                # indicates there's no solution from the current state
+            if target.index not in queued:
+                queued.add(target.index)
+                queue.append(target)
 
-    try:
-        left = a_board.go_left(a_cell)
-    except ValueError:
-        left = None
+    return 0
 
-    try:
-        right = a_board.go_right(a_cell)        
-    except ValueError:
-        right = None
 
-    try:
-        up = a_board.go_up(a_cell)
-    except ValueError:
-        up = None
+def blame_revision(a_board: Board, a_cell: Cell, target: Cell, 
+        arc: int) -> None:
+    """ Works with forward_checking, which calls it when the domain of 
+    the target has been emptied by a revision from the given cell, and 
+    raises the weight of the constraint behind that revision. "arc" is 
+    the position of the revision among the arcs of the cell, or a 
+    negative number if the revision came from a row or a column."""
 
-    try:
-        down = a_board.go_down(a_cell)
-    except ValueError:
-        down = None
-
-    neighbors = [up, down, left, right]
-    # The Cell objects in the list are arranged in the same order
-    # as the constraint field of the Cell class (which stores 
-    # the strings that represent the constraints regarding the
-    # cell's neighbors): the neighbor above ("up"), below ("down"),
-    # left and then right
-
-    up_ret = 0
-    down_ret = 0
-    left_ret = 0
-    right_ret = 0
-    # The point is to initialize these variables. If the recursive 
-    # calls in the code below are executed, these variables 
-    # will hold the return values of those calls
-
-    ret_vals = [up_ret, down_ret, left_ret, right_ret]
-    # The variables to store the return values are arranged in 
-    # the same order as the list of Cell objects above: up, 
-    # down, left and right
-
-    constr_strings = [["STU", "GTU"], ["STD", "GTD"],
-            ["STL", "GTL"], ["STR", "GTR"]]
-    # A list that contains all the strings that represent 
-    # constraints regarding neighbors.
-    # Arranged in the same order as the list of Cell objects 
-    # above: the first sublist contains the two types of 
-    # constraints for the neighbor above, the second sublist 
-    # is for the neighbor below, followed by those for "left"
-    # and "right"
+    if arc >= 0:
+        a_board.weights[a_board.arc_ids[a_cell.index][arc]] += 1
+    elif a_cell.coord[0] == target.coord[0]:
+        a_board.weights[a_cell.coord[0]] += 1
+    else:
+        a_board.weights[a_board.size + a_cell.coord[1]] += 1
+
+
+def start_fc(a_board: Board, a_cell: Cell = None, 
+        cells: list = None) -> int:
+    """ This is the overarching function for forward checking, which runs 
+    the AC-3 algorithm on the given Board. The work queue starts with the 
+    given Cell object (typically the cell that has just been assigned a 
+    value), with the given list of cells if there are several, or with 
+    every cell on the board if neither is given. Each cell popped from 
+    the queue is passed to forward_checking, which revises the arcs 
+    pointing at it and enqueues the cells whose domains shrank. Only 
+    constraints touching cells that actually changed are ever revisited, 
+    and the board has reached its fixed point when the queue runs empty, 
+    at which point start_fc returns 0. It returns 1 when there's no 
+    solution to the puzzle, i.e. when a domain has been reduced to none."""
     
+    if a_cell != None:
+        queue = deque([a_cell])
+    elif cells != None:
+        queue = deque(cells)
+    else:
+        queue = deque(a_board.flat)
+    queued = set(cell.index for cell in queue)
+    cell_lines = a_board.topology.cell_lines
+    dirty = set()
+    # The rows and columns (numbered as in Topology.lines) holding a 
+    # cell whose domain has changed, which propagate_line has yet to see
+
+    stats = a_board.stats
+    if stats != None:
+        start = time.perf_counter()
+    calls = 0
+    rounds = 0
+    # Counted whether or not there's a SearchStats object, since an 
+    # addition costs next to nothing beside a call of forward_checking
+
+    failed = 0
+    while True:
+        rounds += 1
+        while queue:
+            current = queue.popleft()
+            calls += 1
+            queued.discard(current.index)
+            dirty.update(cell_lines[current.index])
+            if forward_checking(a_board, current, queue, queued):
+                # forward_checking returns 1 when there's no solution to 
+                # the puzzle and returns 0 when it has run without error
+                failed = 1
+                break
+
+        """ The cheap arc revisions have reached their fixed point. Only 
+        then is the more expensive all-different propagation run, one 
+        line at a time; every domain it shrinks puts the cell back on 
+        the queue, so the arcs are revised again before the next line. 
+        A board with PAIRWISE propagation stops at the arcs."""
+        if failed or not dirty or a_board.propagation == PAIRWISE:
+            break
+        if propagate_line(a_board, dirty.pop(), queue, queued):
+            failed = 1
+            break
 
-    origin_row = a_cell.coord[0]
-    origin_col = a_cell.coord[1]
-    if a_cell.assign != None:
-        # If the origin cell has been assigned a value, remove 
-        # this value from the domains of all other cells that 
-        # in the same row or column
-
-        targets = []
-        # Stores references to all cells that are in the same
-        # column or row
-
-        for i in range(0, 5):
-            # Add to the list "targets" the cells that are in 
-            # the same column as the origin cell
-            if i == origin_row:
-                # Skip the origin cell itself
-                continue
-            targets.append(a_board.cells[i][origin_col])
-                        
-        for i in range(0, 5):
-            # Add to the list the cells that are in the same 
-            # row as the origin cell
-            if i == origin_col:
-                # Skip the origin cell itself
-                continue
-            targets.append(a_board.cells[origin_row][i])
-        
-        for i in range(len(targets)):
-            current_cell = targets[i]
-            if current_cell.assign == None:
-                # If the current cell has yet to be assigned 
-                # a value, remove the origin's assigned value
-                # from the current cell's domain, if applicable
-                new_domain = copy.deepcopy(current_cell.domain)
-                for j in range(len(current_cell.domain)):
-                    if current_cell.domain[j] == a_cell.assign:
-                        new_domain.remove(current_cell.domain[j])
-                        break
-
-                current_cell.domain = new_domain
-
-    for i in range(len(neighbors)):
-        if isinstance(neighbors[i], Cell):
-            # If the Cell object looked for was returned by
-            # the methods of the Board class
-            # Python's isinstance function returns True when 
-            # the first parameter is an instance of the second
-
-            if neighbors[i].assign == None:
-                # If the cell is empty, the indented code below 
-                # will be run;
-                # If the cell has been assigned a value, 
-                # the program will jump to the recursive call ahead
-
-                new_domain = copy.deepcopy(neighbors[i].domain)
-                # Since the following code involves a lot of removal 
-                # of elements in a list, the list of domain values 
-                # is copied into this variable "new_domain", which 
-                # will be used as a temporary variable from which 
-                # elements are removed. Once all removal is done, 
-                # neighbors[i].domain will be updated with the list 
-                # contained in new_domain.
-
-                if a_cell.constr[i] == constr_strings[i][0]:
-                # The list of Cell objects, the list of constraint 
-                # strings and the list of return values all arrange 
-                # their elements in the up-down-left-right order
-                # Therefore the same index can locate the particular 
-                # element for the same neighboring cell
-                
-                # The elements in constr_strings are ordered in such
-                # a way that constr_strings[i][0] is always the string 
-                # that denotes a "smaller than" relation, whereas
-                # constr_strings[i][1] is the one that denotes a
-                # "greater than" relation
-
-                    if a_cell.assign != None:
-                        # If the origin cell has been assigned
-                        # a value
-
-                        for j in range(len(neighbors[i].domain)):
-                            if neighbors[i].domain[j] <= a_cell.assign:
-                                new_domain.remove(neighbors[i].domain[j])
-                                # Remove the values that are smaller 
-                                # than or equal to the origin's 
-                                # assigned value
-
-                elif a_cell.constr[i] == constr_strings[i][1]:
-                    # constr_strings[i][1] is always the string that
-                    # refers to a "greater than" relation
-
-                    if a_cell.assign != None:
-                        for j in range(len(neighbors[i].domain)):
-                            if neighbors[i].domain[j] >= a_cell.assign:
-                                new_domain.remove(neighbors[i].domain[j])
-
-                neighbors[i].domain = copy.deepcopy(new_domain)
-                # Updating neighbors[i].domain with the newer list 
-                # of domain values contained in new_domain
-
-                if len(neighbors[i].domain) == 0:
-                    return 1
-                    # If an empty cell's domain has been reduced to none,
-                    # return 1, which indicates the puzzle has no solution
-                    # The return value will be caught by the function 
-                    # that makes the call, which will then stop the program
-
-                    # The domain field of a Cell is "None" only if the Cell
-                    # has not been assigned a value, in which case the 
-                    # entire code block will have been skipped due to the 
-                    # "if neighbors[i].assign == None" statement above.
-                    # Therefore this line does not incur a runtime error.
-
-            ret_vals[i] = forward_checking(a_board, neighbors[i],
-                    explored)
-            """ This line is executed if the neighbor has been assigned 
-            a value or the neighbor's domain is not empty after the 
-            reduction."""
-       
-    return max(ret_vals)
-    """ If any of the recursive calls returns one, there's no solution 
-    to the puzzle. If any of the four elements of "ret_vals" equals 
-    one, the function will return one. The preceding function that made 
-    the first call to forward_checking will stop the program if the 
-    return value is one and continue if it's zero."""
-
-
-def identical_boards(prev_board: Board, curr_board: Board) -> bool:
-    """ The function works in tandem with start_fc. It takes two Board 
-    objects and verifies whether they are identical, i.e. whether the 
-    assigned values and domains of each cell are identical between the 
-    two boards. It returns False as soon as a difference is spotted; 
-    if no difference is found after comparing all twenty-five cells, 
-    it returns True."""
-
-    for i in range(0, 5):
-        for j in range(0, 5):
-            prev_cell = prev_board.cells[i][j]
-            curr_cell = curr_board.cells[i][j]
-
-            if prev_cell.assign != curr_cell.assign:
-                return False
-
-            if prev_cell.domain != curr_cell.domain:
-                return False
-
-            """ The other two fields of the Cell class, the coordinate 
-            and the list of constraints, are not compared because they 
-            are not altered over the course of forward checking. Only 
-            the assigned value and the list of domain values need to 
-            be compared."""
-
-    return True
-
-
-def calc_degree(a_board: Board, origin: Cell) -> int:
-    """ The function takes a Board object and a Cell object as its 
-    parameters and returns the degree of the given cell, which 
-    equals the number of constraints the cell has regarding its 
-    **unassigned** neighbors."""
+    if failed and a_board.hooks != None:
+        a_board.hooks.on_wipeout(a_board, a_cell)
+    if stats != None:
+        stats.propagations += 1
+        stats.fc_calls += calls
+        stats.rounds += rounds
+        stats.wipeouts += failed
+        stats.propagate_seconds += time.perf_counter() - start
+    return failed
+
+
+def propagate_line(a_board: Board, line: int, queue: deque, 
+        queued: set) -> int:
+    """ Enforces generalized arc consistency on the all-different 
+    constraint of one row or column (Regin's algorithm): a value stays 
+    in a cell's domain only if the cells of the line can still take 
+    distinct values with the cell taking that one. This subsumes hidden 
+    singles (a value left in a single cell of the line is assigned to 
+    it), naked subsets (k cells sharing k values remove them from the 
+    rest of the line) and hidden subsets alike. Cells whose domains 
+    shrink are queued as in forward_checking. Returns 1 if the cells 
+    can't take distinct values at all and 0 otherwise."""
+
+    cells = a_board.flat
+    members = [cells[index] for index in a_board.topology.lines[line]]
+    domains = [a_cell.domain for a_cell in members]
+    size = len(members)
+
+    seen = 0
+    multiple = 0
+    culprits = 0
+    for a_cell in members:
+        multiple |= seen & a_cell.domain
+        seen |= a_cell.domain
+        culprits |= a_cell.culprits
+        # Whatever this function concludes follows from the domains of 
+        # the whole line
+    a_board.conflict = culprits
+    if seen != full_domain(size):
+        a_board.weights[line] += 1
+        return 1
+        # Some value can't be placed anywhere in the line
+    if multiple == 0:
+        return 0
+        # Every value is left in a single cell, i.e. the domains are 
+        # all singletons, so there's nothing to remove
+
+    """ Finds a perfect matching between the cells of the line and the 
+    values by augmenting paths, starting each cell with the lowest 
+    value that's still free. owner[v] is the position in the line of 
+    the cell matched to the value v, and matched[p] the value matched 
+    to the cell at position p."""
+    owner = [-1] * (size + 1)
+    matched = [0] * size
+    for position in range(0, size):
+        if not augment(domains, owner, matched, position, 0):
+            a_board.weights[line] += 1
+            return 1
+            # Fewer values than cells are left for some group of cells
+
+    """ In a perfect matching every value is matched, so a value v in 
+    the domain of the cell at position p can be kept if it's matched to 
+    that cell, or if p and the owner of v lie on a common cycle of the 
+    graph in which p points at the owners of all values in its domain, 
+    i.e. in the same strongly connected component."""
+    component = strong_components(domains, owner)
+    for position in range(0, size):
+        allowed = 0
+        for value in domain_values(domains[position]):
+            if component[owner[value]] == component[position]:
+                allowed |= 1 << value
+        if allowed != domains[position]:
+            a_cell = members[position]
+            a_board.set_domain(a_cell, allowed, culprits)
+            if a_cell.index not in queued:
+                queued.add(a_cell.index)
+                queue.append(a_cell)
 
-    degree = 0
-    for i in range(len(origin.constr)):
-        if (origin.constr[i] == "N/A") or (origin.constr[i] == "None"):
-            continue
+    return 0
 
-        """ The strings that represent constraints are all in a form 
-        similar to "STU", "GTD" and so on, as explained previously. 
-        Therefore the third letter of the string indicates which 
-        neighbor the constraint applies to."""
-        if origin.constr[i][2] == 'U':
-            neighbor = a_board.go_up(origin)
-        elif origin.constr[i][2] == 'D':
-            neighbor = a_board.go_down(origin)
-        elif origin.constr[i][2] == 'L':
-            neighbor = a_board.go_left(origin)
-        elif origin.constr[i][2] == 'R':
-            neighbor = a_board.go_right(origin)
-        
-        if neighbor.assign == None: degree += 1
 
-    return degree
+def augment(domains: list, owner: list, matched: list, position: int, 
+        visited: int) -> int:
+    """ Works with propagate_line. Looks for an augmenting path from the 
+    cell at the given position: it takes a free value from its domain 
+    if there is one, and otherwise takes a value away from another cell 
+    that can be matched to a different value. "visited" is the bitset 
+    of values already tried on the current path. Returns the updated 
+    bitset if the path was found, and 0 if not."""
+
+    candidates = domains[position] & ~visited
+    free = candidates
+    while free:
+        lowest = free & -free
+        value = lowest.bit_length() - 1
+        if owner[value] == -1:
+            owner[value] = position
+            matched[position] = value
+            return visited | lowest
+        free ^= lowest
+
+    visited |= candidates
+    while candidates:
+        lowest = candidates & -candidates
+        value = lowest.bit_length() - 1
+        result = augment(domains, owner, matched, owner[value], visited)
+        if result:
+            owner[value] = position
+            matched[position] = value
+            return result
+        candidates ^= lowest
 
+    return 0
 
-def start_fc(a_board: Board, a_cell: Cell) -> int:
-    """ This is the overarching function for forward checking. It calls 
-    forward_checking on the given Cell object, located on the given Board, 
-    and returns 1 when there's no solution to the puzzle (same as how 
-    forward_checking behaves). If forward_checking returns 0, meaning that 
-    function ran without error, start_fc calls identical_boards to verify 
-    whether the board has been modified. If yes, start_fc repeatedly calls 
-    forward_checking on the same cell of the same board until the board is 
-    no longer modified, after which start_fc returns 0. The point is to 
-    ensure every other cell's domain is updated once a cell has been 
-    modified."""
-    
-    identical = False
-    explored = set()
-    while not identical:
-        explored.clear()
-        prev_board = copy.deepcopy(a_board)
-        # Saves a copy of the original board
-        failure = forward_checking(a_board, a_cell, explored)
-        if failure:
-            # forward_checking returns 1 when there's no solution to 
-            # the puzzle and returns 0 when it has run without error
-            return 1
-        identical = identical_boards(prev_board, a_board)
 
-    return 0
+def strong_components(domains: list, owner: list) -> list:
+    """ Works with propagate_line. Numbers the strongly connected 
+    components (Tarjan's algorithm) of the graph in which the cell at 
+    each position points at the owners of the values in its domain, 
+    and returns the component number of every position."""
+
+    size = len(domains)
+    component = [-1] * size
+    order = [-1] * size
+    low = [0] * size
+    stack = []
+    on_stack = [False] * size
+    counter = [0, 0]
+    # The next visiting order and the next component number
+
+    def visit(position: int) -> None:
+        order[position] = low[position] = counter[0]
+        counter[0] += 1
+        stack.append(position)
+        on_stack[position] = True
+        for value in domain_values(domains[position]):
+            successor = owner[value]
+            if order[successor] == -1:
+                visit(successor)
+                low[position] = min(low[position], low[successor])
+            elif on_stack[successor]:
+                low[position] = min(low[position], order[successor])
+
+        if low[position] == order[position]:
+            # The position is the root of a component; pop its members
+            while True:
+                member = stack.pop()
+                on_stack[member] = False
+                component[member] = counter[1]
+                if member == position:
+                    break
+            counter[1] += 1
+
+    for position in range(0, size):
+        if order[position] == -1:
+            visit(position)
+    return component
 
 
 def select_unassigned_cell(a_board: Board) -> Cell:
     """ The function takes a Board object as its parameter and returns 
     a cell on the board, selected by the minimum-remaining-values (MRV) 
-    heuristic and, in case there's a tie, the degree heuristic as well."""
-
-    ranking = []
-    """ After the following for loop has completed, the list "ranking" 
-    will contain all cells on the board, ranked by the number of values 
-    in each cell's domain in ascending order."""
-
-    for i in range(0, 5):
-        for j in range(0, 5):
-            current = a_board.cells[i][j]
-            if current.assign == None:
-                inserted = False
-                for k in range(len(ranking)):
-                    if len(ranking[k].domain) >= len(current.domain):
-                        ranking.insert(k, current)
-                        # Insert the current cell into the list,
-                        # ahead of the first element that has more 
-                        # remaining values or the same number of remaining
-                        # values
-                        inserted = True
-                        break
-                if not inserted:
-                    # Indicates the current cell has more remaining values
-                    # than any element in the list
-                    ranking.append(current)
-
-    if len(ranking) == 1: return ranking[0]
-    tied = [ranking[0]]
-    # At this point the first element in the list "ranking" has the
-    # least remaining values in its domain
-    ind = 1
-    while len(ranking[ind].domain) == len(tied[0].domain):
-        # Loop through the list to find out if any other cell has the
-        # same number of remaining values, i.e. whether there's a tie
-        tied.append(ranking[ind])
-        ind += 1
-        if ind == len(ranking):
-            break
-
-    if len(tied) == 1: return tied[0]
-    # Indicates there's no tie. Return the only element in the 
-    # list "tied"
-    
-    """ If there is a tie, call the calc_degree function on each 
-    cell in the list "tied" to rank these cells by their degrees in 
-    descending order."""
-    degree_ranking = []
-    for i in range(len(tied)):
-        degree_ranking.append((i, calc_degree(a_board, tied[i])))
-        # Appends a tuple whose first element is the cell's index in
-        # the list "tied" and second element is the degree
-    
-    degree_ranking = sorted(degree_ranking, key=lambda pair: pair[1],
-            reverse=True)
-    """ In Python, lambda is an anonymous function. Here the function 
-    contains the expression that returns the second element of each 
-    tuple as the key for sorting, i.e. the degree of each cell. The 
-    parameter "reverse=True" instructs the function to sort in 
-    descending order; without this parameter, the function sorts in 
-    ascending order by default.
+    heuristic and, in case there's a tie, the degree heuristic as well. 
+    Boards set up with the DOM_WDEG heuristic are handed to 
+    select_by_weight instead."""
 
-    After sorting, the first tuple in degree_ranking refers to the cell 
-    with the lowest degree. Since the first element of the tuple is the 
-    cell's index in "tied", subscript "tied" with this index to return 
-    the cell."""
+    if a_board.heuristic == DOM_WDEG:
+        return select_by_weight(a_board)
 
-    return tied[degree_ranking[0][0]]
-
-
-def order_domain_values(a_cell: Cell) -> list:
-    """ The function takes a Cell object, sorts its list of domain 
-    values in ascending order and returns the sorted list."""
+    for tied in a_board.buckets:
+        if tied:
+            break
+    # "tied" is now the first non-empty bucket, i.e. the set of all 
+    # unassigned cells with the least remaining values in their domains
+
+    """ If there's a tie, the cell with the highest degree is selected, 
+    and among those the one furthest down the board. Only the cells in 
+    the bucket are looked at, which at most search nodes are a few."""
+    cells = a_board.flat
+    selected = None
+    best = None
+    for index in tied:
+        rank = (calc_degree(a_board, cells[index]), index)
+        if best == None or rank > best:
+            selected = cells[index]
+            best = rank
+
+    return selected
+
+
+def select_by_weight(a_board: Board) -> Cell:
+    """ The dom/wdeg heuristic: returns the unassigned cell with the 
+    smallest ratio of its domain size to its weighted degree, i.e. the 
+    sum of the failure weights (see Board.weights) of its constraints 
+    that still involve another unassigned cell. Since a weight grows 
+    every time its constraint empties a domain, the search is drawn to 
+    the part of the puzzle where it has failed the most so far."""
+
+    cells = a_board.flat
+    weights = a_board.weights
+    open_cells = [0] * (2 * a_board.size)
+    # The number of unassigned cells in each row and column
+    for a_cell in cells:
+        if a_cell.assign == None:
+            for line in a_board.topology.cell_lines[a_cell.index]:
+                open_cells[line] += 1
+
+    selected = None
+    for a_cell in cells:
+        if a_cell.assign != None:
+            continue
+        weight = 0
+        for line in a_board.topology.cell_lines[a_cell.index]:
+            if open_cells[line] > 1:
+                weight += weights[line]
+        arcs = a_board.arcs[a_cell.index]
+        for k in range(len(arcs)):
+            if cells[arcs[k][0]].assign == None:
+                weight += weights[a_board.arc_ids[a_cell.index][k]]
+
+        size = domain_size(a_cell.domain)
+        if selected == None or size * best_weight < best_size * weight:
+            # Compares size / weight with best_size / best_weight 
+            # without dividing; a weight of 0 never wins over another
+            selected = a_cell
+            best_size = size
+            best_weight = weight
+
+    return selected
+
+
+def order_domain_values(a_cell: Cell, a_board: Board = None) -> list:
+    """ The function takes a Cell object and returns its domain values 
+    as a list sorted in ascending order, or, if the Board object the 
+    cell is on was set up with the LEAST_CONSTRAINING order, sorted by 
+    how few values each of them would remove from the domains of the 
+    other unassigned cells (see count_removals)."""
+
+    """ domain_values walks the bitset from the lowest bit upward, so 
+    the list it returns is already sorted and no call to sorted() is 
+    needed."""
+    values = domain_values(a_cell.domain)
+    if a_board == None or a_board.value_order != LEAST_CONSTRAINING:
+        return values
+    if len(values) <= 1:
+        return values
+
+    removals = count_removals(a_board, a_cell)
+    return sorted(values, key=lambda value: removals[value])
+    # sorted is stable, so values that remove equally many are still 
+    # tried in ascending order
+
+
+def count_removals(a_board: Board, a_cell: Cell) -> list:
+    """ Works with order_domain_values. Returns a list indexed by value, 
+    in which the entry of each value in the domain of the given cell is 
+    the number of values that assigning it would remove right away from 
+    the domains of the unassigned cells that share a row, a column or a 
+    sign with the cell. Only the first step of propagation is counted, 
+    which keeps the count cheap: one pass over the peers for the "not 
+    equal" constraints, and one over the arcs for the inequalities."""
+
+    cells = a_board.flat
+    domain = a_cell.domain
+    removals = [0] * (a_board.size + 2)
+
+    for peer in a_board.topology.peers[a_cell.index]:
+        other = cells[peer]
+        if other.assign == None:
+            shared = other.domain & domain
+            while shared:
+                # Every value the peer shares with the cell would be 
+                # removed from the peer if the cell took it
+                lowest = shared & -shared
+                removals[lowest.bit_length() - 1] += 1
+                shared ^= lowest
+
+    for neighbor, relation in a_board.arcs[a_cell.index]:
+        other = cells[neighbor]
+        if other.assign != None:
+            continue
+        for value in domain_values(domain):
+            if relation == SMALLER:
+                lost = other.domain & ~values_above(value)
+            else:
+                lost = other.domain & ~values_below(value)
+            removals[value] += domain_size(lost & ~(1 << value))
+            # The value itself has been counted with the peers already, 
+            # since neighbors are always in the same row or column
 
-    """ Python's sorted() function does NOT alter the original list; 
-    it simply creates a new list during sorting and returns the new, 
-    sorted list."""
-    return(sorted(a_cell.domain))
+    return removals
 
 
 def is_complete(a_board: Board) -> bool:
-    """ The function takes a Board object as its parameter and loops 
-    through all cells on the board to verify whether each has been 
-    assigned a value. It returns False as soon as an unassigned 
-    cell is spotted. Otherwise it returns True after the for loop 
-    has completed."""
-
-    for i in range(0, 5):
-        for j in range(0, 5):
-            if a_board.cells[i][j].assign == None:
-                return False
+    """ The function takes a Board object as its parameter and verifies 
+    whether each cell has been assigned a value, i.e. whether all 
+    buckets of unassigned cells (see the Board class) are empty."""
+
+    for bucket in a_board.buckets:
+        if bucket:
+            return False
     return True
 
 
@@ -720,39 +1408,19 @@ def is_consistent(a_board: Board, a_cell: Cell, value: int) -> bool:
     otherwise it returns True when all conditions have been met."""
 
     
-    current_row = a_cell.coord[0]
-    current_column = a_cell.coord[1]
-    for i in range(0, 5):
-        if i == current_column: continue
-        if a_board.cells[current_row][i].assign != None:
-            if a_board.cells[current_row][i].assign == value:
-                return False
-
-    for i in range(0, 5):
-        if i == current_row: continue
-        if a_board.cells[i][current_column].assign != None:
-            if a_board.cells[i][current_column].assign == value:
-                return False
+    cells = a_board.flat
+    for peer in a_board.topology.peers[a_cell.index]:
+        if cells[peer].assign == value:
+            return False
 
     """ This part verifies whether the candidate value complies with 
     all the constraints on the given cell."""
-    constr = a_cell.constr
-    for i in range(len(constr)):
-        if (constr[i] == "N/A") or (constr[i] == "None"):
-            continue
-        if constr[i][2] == 'U':
-            neighbor = a_board.go_up(a_cell)
-        elif constr[i][2] == 'D':
-            neighbor = a_board.go_down(a_cell)
-        elif constr[i][2] == 'L':
-            neighbor = a_board.go_left(a_cell)
-        elif constr[i][2] == 'R':
-            neighbor = a_board.go_right(a_cell)
-
+    for index, relation in a_board.arcs[a_cell.index]:
+        neighbor = cells[index]
         if neighbor.assign == None: continue
-        if (constr[i][0] == 'S') and (value >= neighbor.assign):
+        if (relation == SMALLER) and (value >= neighbor.assign):
             return False
-        if (constr[i][0] == 'G') and (value <= neighbor.assign):
+        if (relation == GREATER) and (value <= neighbor.assign):
             return False
     
     return True
@@ -761,67 +1429,350 @@ def is_consistent(a_board: Board, a_cell: Cell, value: int) -> bool:
 def backtrack(a_board: Board) -> bool:
     """ The function takes a Board object as its parameter and runs 
     backtracking on the board. If a solution can be obtained, it 
-    calls generate_output and then returns True."""
+    returns True and leaves the solution assigned on the board, so 
+    that the caller can pass the board on to generate_output."""
 
-    if is_complete(a_board):
-        # If the assignment is complete, generate the output file
-        # and then return True
-        generate_output(a_board)
+    for solved in search(a_board):
         return True
+        # The search stops at the first solution. Abandoning the 
+        # generator doesn't undo anything, so the board keeps holding 
+        # the solution
+    return False
+
+
+def search(a_board: Board, level: int = 1):
+    """ The backtracking search itself, written as a generator: every 
+    time the assignment on the given board is complete, it yields the 
+    board, and it resumes the search from where it left off when the 
+    next solution is asked for. Once all solutions have been yielded, 
+    the board has been restored to the state it was passed in.
+
+    The search is conflict-directed: when the cell chosen at this level 
+    ("level" counts the assignments made by the search so far, starting 
+    from 1) runs out of values, the generator returns the conflict set, 
+    i.e. the bitset of the earlier levels whose assignments caused the 
+    failures (see the culprits of the Cell class). If the assignment 
+    made at a level isn't part of the conflict set returned from below, 
+    trying the other values at that level would only fail in the same 
+    way, so the search jumps straight back past it. Once a solution has 
+    been found below a level, the conflict set is -1 (every level), which 
+    makes the search chronological again so that no solution is skipped. 
+    Small conflict sets are also kept as nogoods (see record_nogood).
+
+    If the board has a node budget and the search runs out of it, every 
+    level lists its untried values in a_board.frontier and returns -1, 
+    so that the levels above don't backjump past their own untried 
+    values and no nogood is recorded from the unfinished search. The 
+    board is restored all the same."""
+
+    hooks = a_board.hooks
+    if is_complete(a_board):
+        # If the assignment is complete, hand the board to the caller 
+        # before undoing anything, so that the board holds the solution
+        if hooks != None:
+            hooks.on_solution(a_board)
+        yield a_board
+        return -1
     
+    if hooks != None:
+        hooks.on_node_enter(a_board, level)
+    stats = a_board.stats
+    if stats != None:
+        if level > stats.max_depth:
+            stats.max_depth = level
+        start = time.perf_counter()
     selected = select_unassigned_cell(a_board)
+    sorted_domain = order_domain_values(selected, a_board)
+    if stats != None:
+        stats.select_seconds += time.perf_counter() - start
     
-    # The two lines below keep track of the row & column numbers 
-    # of the selected cell
-    """ The reason is as deep copies of the board will be created in 
-    the code below, and the variable "selected" will need to be 
-    reassigned the Cell object on the newly-created board. """
-    cell_row = selected.coord[0]
-    cell_col = selected.coord[1]
-    
-    sorted_domain = order_domain_values(selected)
+    mark = len(a_board.trail)
+    # Remembers the length of the board's trail before the recursive 
+    # calls are made so that if the algorithm backtracks, the original 
+    # state of the board can be restored by undoing every change 
+    # recorded after this point
+
+    level_bit = 1 << level
+    conflict = selected.culprits
+    # The values missing from the domain of the selected cell are 
+    # missing because of its culprits, which therefore belong to the 
+    # conflict set as well
+
+    budget = a_board.budget
     for i in range(len(sorted_domain)):
-        old_board = copy.deepcopy(a_board)
-        # Created a deep copy of the board before the recursive calls 
-        # are made so that if the algorithm backtracks, the original 
-        # state of the board can be restored
-
-        selected = a_board.cells[cell_row][cell_col]
-        # As stated previously, "selected" needs to be re-assigned
-        # the Cell object on the newly-created board
-
-        if is_consistent(a_board, selected, sorted_domain[i]):
-            selected.assign = sorted_domain[i]
-            selected.domain = None
-            if not start_fc(a_board, selected):
-                # Run forward checking after the cell has been assigned
-                # a value. Only make the recursive call to backtrack 
-                # if start_fc returns 0, which indicates forward checking 
-                # was completed without spotting any cell with an empty 
-                # domain
-                if backtrack(a_board): return True
-        
-        a_board = copy.deepcopy(old_board)
-        # The function only reaches this point when the candidate value, 
-        # sorted_domain[i], made the algorithm backtrack. In that case, 
-        # use the deep copy previously made to restore the board and 
-        # move onto the next iteration of the for loop
-    
-    return False
+        if budget != None and a_board.nodes >= budget:
+            path = a_board.decisions[:level - 1]
+            for value in sorted_domain[i:]:
+                a_board.frontier.append(path + [(selected.index, value)])
+            if hooks != None:
+                hooks.on_node_exit(a_board, level, -1)
+            return -1
+
+        if not is_consistent(a_board, selected, sorted_domain[i]):
+            if stats != None:
+                stats.rejected += 1
+            conflict = -1
+            # Can't tell which assignment is to blame, so fall back on 
+            # chronological backtracking
+            continue
+
+        culprits = find_nogood(a_board, selected.index, sorted_domain[i])
+        if culprits != None:
+            if stats != None:
+                stats.nogood_hits += 1
+            conflict |= culprits
+            # The value has already been proven to fail together with 
+            # the assignments at these levels
+            continue
 
+        a_board.set_assign(selected, sorted_domain[i], level_bit)
+        a_board.nodes += 1
+        if hooks != None:
+            hooks.on_assign(a_board, level, selected, sorted_domain[i])
+        a_board.decisions[level - 1:] = [(selected.index, sorted_domain[i])]
+        # Also drops what's left over from a search that was abandoned 
+        # at a solution
+        if start_fc(a_board, selected):
+            # Run forward checking after the cell has been assigned
+            # a value. Only make the recursive call to search 
+            # if start_fc returns 0, which indicates forward checking 
+            # was completed without spotting any cell with an empty 
+            # domain
+            failed = a_board.conflict
+        else:
+            failed = yield from search(a_board, level + 1)
+        
+        if stats != None:
+            start = time.perf_counter()
+            a_board.undo(mark)
+            stats.undo_seconds += time.perf_counter() - start
+        else:
+            a_board.undo(mark)
+        # The function reaches this point when the candidate value, 
+        # sorted_domain[i], made the algorithm backtrack, or when all 
+        # solutions that it leads to have been yielded. In either case, 
+        # pop the trail back to the mark taken previously to restore 
+        # the board and move onto the next iteration of the for loop
+
+        if not failed & level_bit:
+            if stats != None:
+                stats.backjumps += 1
+            if hooks != None:
+                hooks.on_node_exit(a_board, level, failed)
+            return failed
+            # The failure didn't depend on the assignment at this level
+        conflict |= failed & ~level_bit
+
+    record_nogood(a_board, conflict)
+    if hooks != None:
+        hooks.on_node_exit(a_board, level, conflict)
+    return conflict
+
+
+NOGOOD_SIZE = 3
+# The largest number of assignments in a nogood kept by record_nogood
+
+
+def record_nogood(a_board: Board, conflict: int) -> None:
+    """ Works with search. The assignments at the levels in the given 
+    conflict set can't all be part of a solution, whatever else is 
+    assigned. If there are no more than NOGOOD_SIZE of them, they're 
+    kept in a_board.nogoods, so that search doesn't walk into the same 
+    failure again after having assigned the same cells in another 
+    order."""
+
+    if conflict <= 0 or domain_size(conflict) > NOGOOD_SIZE:
+        return
+    nogood = tuple(a_board.decisions[level - 1] 
+            for level in domain_values(conflict))
+    for pair in nogood:
+        a_board.nogoods.setdefault(pair, []).append(nogood)
+
+
+def find_nogood(a_board: Board, index: int, value: int) -> int:
+    """ Works with search. Returns the levels of the other assignments 
+    of a nogood that would be completed by assigning the value to the 
+    cell with the given index (0 if the nogood consists of that 
+    assignment alone), or None if there's no such nogood."""
+
+    cells = a_board.flat
+    for nogood in a_board.nogoods.get((index, value), ()):
+        culprits = 0
+        for other, other_value in nogood:
+            if other == index:
+                continue
+            if cells[other].assign != other_value:
+                break
+            culprits |= cells[other].culprits
+        else:
+            return culprits
+    return None
+
+
+def get_solution(a_board: Board) -> list:
+    """ Returns the values assigned on the given (solved) board as a 
+    size-by-size list of integers, in the same layout as the initial 
+    state returned by load_input."""
+    return [[a_cell.assign for a_cell in a_row] for a_row in a_board.cells]
+
+
+def prepare_board(puzzle, constr: list = None, 
+        heuristic: int = MRV, value_order: int = ASCENDING, 
+        propagation: int = ALL_DIFFERENT) -> Board:
+    """ Builds the Board object for the library functions below. 
+    "puzzle" is either a string in the format of the input files, or the 
+    initial state as a size-by-size list of integers (0 for an empty 
+    cell), in which case "constr" is the list of constraints in the 
+    format returned by load_input; if "constr" is omitted, the puzzle 
+    has no constraints of inequality. "heuristic" chooses how the 
+    search picks the next cell (see select_unassigned_cell), and 
+    "value_order" in which order it tries the values of that cell (see 
+    order_domain_values), and "propagation" how strongly the rows and 
+    columns are propagated (see start_fc)."""
+
+    [initial_state, constr] = normalize_puzzle(puzzle, constr)
+    return initialize_board(initial_state, constr, heuristic, value_order, 
+            propagation)
+
+
+def normalize_puzzle(puzzle, constr: list = None) -> list:
+    """ Returns the puzzle, given as described in prepare_board, as a 
+    list [initial_state, constr] in the format returned by load_input."""
+
+    if isinstance(puzzle, str):
+        return parse_input(puzzle)
+
+    if constr == None:
+        size = len(puzzle)
+        constr = [[[NO_CONSTR, NO_CONSTR, NO_CONSTR, NO_CONSTR] 
+            for j in range(0, size)] for i in range(0, size)]
+    return [puzzle, constr]
+
+
+def solve(puzzle, constr: list = None, heuristic: int = MRV, 
+        value_order: int = ASCENDING, stats: SearchStats = None, 
+        hooks: SearchHooks = None, 
+        propagation: int = ALL_DIFFERENT) -> list:
+    """ The library entry point of the solver, which neither prompts nor 
+    touches any file. The puzzle is given as described in prepare_board. 
+    Returns the solution as a size-by-size list of integers, or None if 
+    the puzzle has no solution. If a SearchStats object is given, the 
+    work done is added to its counters, and if a SearchHooks object is 
+    given, its methods are called as the search goes on."""
+
+    if stats != None:
+        start = time.perf_counter()
+    a_board = prepare_board(puzzle, constr, heuristic, value_order, 
+            propagation)
+    a_board.stats = stats
+    a_board.hooks = hooks
+    if hooks != None:
+        hooks.on_start(a_board)
+
+    solution = None
+    if not start_fc(a_board) and backtrack(a_board):
+        # If start_fc returns 1, a domain has been reduced to none 
+        # before any search, so there's no need to call backtrack
+        solution = get_solution(a_board)
+
+    if stats != None:
+        stats.nodes += a_board.nodes
+        if solution != None:
+            stats.solutions += 1
+        stats.seconds += time.perf_counter() - start
+    return solution
+
+
+def iter_solutions(puzzle, constr: list = None, limit: int = None, 
+        heuristic: int = MRV, value_order: int = ASCENDING, 
+        stats: SearchStats = None, hooks: SearchHooks = None, 
+        propagation: int = ALL_DIFFERENT):
+    """ A generator that yields the solutions of the puzzle (given as 
+    described in prepare_board) one by one, each as a size-by-size list 
+    of integers. The search only runs as far as needed to produce the 
+    next solution, and it stops for good after "limit" solutions if a 
+    limit is given. If a SearchStats object is given, the work done is 
+    added to its counters as the search goes on; the time the caller 
+    spends between two solutions isn't counted. "hooks" is as in 
+    solve."""
+
+    if limit != None and limit <= 0:
+        return
+
+    start = None
+    if stats != None:
+        start = time.perf_counter()
+    a_board = prepare_board(puzzle, constr, heuristic, value_order, 
+            propagation)
+    a_board.stats = stats
+    a_board.hooks = hooks
+    if hooks != None:
+        hooks.on_start(a_board)
 
-def generate_output(a_board: Board) -> int:
+    try:
+        if start_fc(a_board):
+            return
+
+        found = 0
+        for solved in search(a_board):
+            solution = get_solution(a_board)
+            found += 1
+            if stats != None:
+                stats.solutions += 1
+                stats.seconds += time.perf_counter() - start
+                start = None
+                # The generator is suspended until the caller asks for 
+                # the next solution, if it ever does
+            yield solution
+            if stats != None:
+                start = time.perf_counter()
+            if found == limit:
+                return
+    finally:
+        # Also runs when the caller abandons the generator
+        if stats != None:
+            stats.nodes += a_board.nodes
+            if start != None:
+                stats.seconds += time.perf_counter() - start
+
+
+def count_solutions(puzzle, constr: list = None, limit: int = None, 
+        heuristic: int = MRV, value_order: int = ASCENDING, 
+        stats: SearchStats = None, hooks: SearchHooks = None, 
+        propagation: int = ALL_DIFFERENT) -> int:
+    """ Returns the number of solutions of the puzzle (given as described 
+    in prepare_board), counting no further than "limit" if a limit is 
+    given. For instance, a limit of 2 answers whether the solution is 
+    unique while stopping the search as soon as a second one turns up. 
+    "stats" and "hooks" are as in iter_solutions."""
+
+    count = 0
+    for solution in iter_solutions(puzzle, constr, limit, heuristic, 
+            value_order, stats, hooks, propagation):
+        count += 1
+    return count
+
+
+def has_unique_solution(puzzle, constr: list = None, 
+        stats: SearchStats = None) -> bool:
+    """ Returns True if the puzzle has exactly one solution. "stats" is 
+    as in iter_solutions."""
+    return count_solutions(puzzle, constr, 2, stats=stats) == 1
+
+
+def generate_output(a_board: Board, out_filename: str = None) -> int:
     """ This function is called when backtrack has obtained a solution. 
-    It takes the Board object passed by backtrack, asks the user for 
-    the output filename and writes the solution into a plain text 
-    file."""
+    It takes the solved Board object and writes the solution into a 
+    plain text file with the given name. If no filename is given, it 
+    asks the user for the output filename."""
 
-    out_filename = input("""Now please enter below the output filename, e.g. "Output1.txt". The filename is case-sensitive.\n""")
+    if out_filename == None:
+        out_filename = input("""Now please enter below the output filename, e.g. "Output1.txt". The filename is case-sensitive.\n""")
     with open(out_filename, 'w') as out_file:
-        for i in range(0, 5):
-            for j in range(0, 5):
+        for i in range(0, a_board.size):
+            for j in range(0, a_board.size):
                 out_file.write(str(a_board.cells[i][j].assign))
-                if j == 4:
+                if j == a_board.size - 1:
                     out_file.write('\n')
                     # Insert the newline character at the end of each line
                 else:
@@ -837,15 +1788,20 @@ def main() -> int:
     input_return = load_input(in_filename)
     # load_input returns a list whose first element is the list of 
     # all cells on the board and second element is the list of constraints 
-    # of all twenty-five cells
+    # of all cells
 
     a_board = initialize_board(input_return[0], input_return[1])
-    start_fc(a_board, a_board.cells[0][0])
-    # Once the board has been initialied, apply forward checking once 
-    # before running backtracking
+    start_fc(a_board)
+    # Once the board has been initialied, apply forward checking to 
+    # every cell once before running backtracking
 
-    backtrack(a_board)
+    if backtrack(a_board):
+        generate_output(a_board)
     return 0
 
 
-main()
+if __name__ == "__main__":
+    main()
+    # Only prompt for the filenames when the file is run as a script, 
+    # so that other modules (and the worker processes of batch_solve) 
+    # can import the solver without being blocked by input()
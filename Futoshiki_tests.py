@@ -41,13 +41,13 @@ def initialize_board_test() -> int:
     [initial_state, constr] = load_input("input1.txt")
     a_board = initialize_board(initial_state, constr)
 
-    for i in range(0,5):
+    for i in range(0, a_board.size):
         print("Row " + str(i) + ": \n")
-        for j in range(0,5):
+        for j in range(0, a_board.size):
             a_cell = a_board.cells[i][j]
             print("Cell coordinates: " + str(a_cell.coord) + '\n')
             print("Assignment: " + str(a_cell.assign) + '\n')
-            print("Domain: " + str(a_cell.domain) + '\n')
+            print("Domain: " + str(domain_values(a_cell.domain)) + '\n')
             print("Constraints: " + str(a_cell.constr) + '\n')
             print('\n')
 
@@ -60,8 +60,8 @@ def board_moves_test(a_board: Board) -> int:
     """ Tests the four methods of the Board class that are for locating a 
     given cell's neighbors: go_up, go_down, go_left and go_right."""
 
-    for i in range(0, 5):
-        for j in range(0, 5):
+    for i in range(0, a_board.size):
+        for j in range(0, a_board.size):
             origin = Cell((i, j), None, None, None)
             print("Origin: " + str(origin.coord) + '\n')
 
@@ -109,7 +109,7 @@ def print_board(a_board: Board) -> int:
                     + str(a_column))
             cell = a_board.cells[a_row][a_column]
             print("Assigned value: " + str(cell.assign))
-            print("Domain: " + str(cell.domain))
+            print("Domain: " + str(domain_values(cell.domain)))
             print("Constraints: " + str(cell.constr))
             print('\n', end = '')
             """ Python 3 automatically adds a newline character to 
@@ -121,42 +121,114 @@ def print_board(a_board: Board) -> int:
     return 0
 
 def forward_checking_test(a_board: Board) -> int:
-    """ The function takes a Board object as the parameter and looks for 
-    the first cell on the board that has been assigned a value. Once found, 
-    that cell is passed to forward_checking. If forward_checking returns 0, 
-    that indicates the operation was conducted successfully, and forward_-
-    checking_test passes the Board object to print_board. If forward_chec-
-    king returns 1, that indicates the puzzle has no solution, and forwad_-
-    checking_test prints a relevant message."""
+    """ The function takes a Board object as the parameter and passes it 
+    to start_fc, which propagates the constraints starting from every 
+    cell on the board. If start_fc returns 0, that indicates the operation 
+    was conducted successfully, and forward_checking_test passes the Board 
+    object to print_board. If start_fc returns 1, that indicates the 
+    puzzle has no solution, and forward_checking_test prints a relevant 
+    message."""
 
 
     
-    failure = start_fc(a_board, a_board.cells[0][0])
+    failure = start_fc(a_board)
     if not failure:
-        print("The function forward_checking was initially " + 
-        "called on the cell " + str(a_board.cells[0][0].coord) + 
-        "; the function returned 0. Forward checking was " + 
+        print("The function start_fc propagated the constraints " + 
+        "starting from every cell on the board and returned 0. " + 
+        "Forward checking was " + 
         "conducted succesfully. The board following the " + 
         " completion of forward checking is shown below: """, 
         end = "\n\n")
         print_board(a_board)
 
     else:
-        print("The function forward_checking returned 1 when " + 
-        "it was initially called on the cell " + 
-        str(a_board.cells[0][0].coord) + ". There is at least one " + 
+        print("The function start_fc returned 1 after propagating " + 
+        "the constraints starting from every cell on the board. " + 
+        "There is at least one " + 
         "cell on the board whose domain has been reduced to " + 
         "none. Therefore there is no solution to this puzzle.")
 
     return 0
 
+def chain_bounds_test(size: int) -> int:
+    """ Puts the chain a < b < c < d at the start of the first row of an 
+    otherwise empty board and a "0 > e < 0" pattern in the second row, 
+    and checks that start_fc alone tightens the bounds of all of them 
+    before a single value has been assigned. The chain needs a size of 
+    at least 4; at exactly 4 it fills the first row, and the value it 
+    fixes above the cell e is also removed from e's column."""
+
+    initial_state = [[0] * size for i in range(0, size)]
+    horizontal = [['0'] * (size - 1) for i in range(0, size)]
+    vertical = [['0'] * size for i in range(0, size - 1)]
+    horizontal[0][0:3] = ['<', '<', '<']
+    horizontal[1][0:2] = ['>', '<']
+    a_board = initialize_board(initial_state, 
+            build_constr(size, horizontal, vertical))
+    if start_fc(a_board):
+        print("start_fc found no solution on an almost empty board. " + 
+                "Test aborted.")
+        return 1
+
+    expected = [list(range(k, size - 3 + k)) for k in range(1, 5)]
+    found = [domain_values(a_cell.domain) for a_cell in a_board.cells[0][0:4]]
+    print("The domains along the chain are " + str(found))
+    if found != expected:
+        print("They should have been " + str(expected) + ". Test aborted.")
+        return 1
+
+    expected = list(range(1, size))
+    if size == 4:
+        expected.remove(2)
+        # The cell above is fixed to 2 by the chain, and the column has 
+        # to hold all different values
+    found = domain_values(a_board.cells[1][1].domain)
+    print("The domain of the cell between the two signs is " + str(found))
+    if found != expected:
+        print("It should have been " + str(expected) + ". Test aborted.")
+        return 1
+    return 0
+
+
+def propagate_line_test() -> int:
+    """ Gives the first row of an empty 4x4 board the domains [1, 2], 
+    [1, 2], [1, 2, 3] and [1, 2, 3, 4]: the first two cells form a naked 
+    pair, which leaves 3 as the only value of the third cell and then 4 
+    as a hidden single in the fourth. propagate_line has to find both 
+    in a single call. A row with three cells sharing two values has no 
+    solution at all."""
+
+    a_board = initialize_board([[0] * 4 for i in range(0, 4)], 
+            [[[NO_CONSTR] * 4 for j in range(0, 4)] for i in range(0, 4)])
+    domains = [0b110, 0b110, 0b1110, 0b11110]
+    for j in range(0, 4):
+        a_board.set_domain(a_board.cells[0][j], domains[j])
+
+    queue = deque()
+    failure = propagate_line(a_board, 0, queue, set())
+    found = [domain_values(a_cell.domain) for a_cell in a_board.cells[0]]
+    print("propagate_line returned " + str(failure) + 
+            " and left the domains " + str(found))
+    if failure or found != [[1, 2], [1, 2], [3], [4]] or len(queue) != 2:
+        print("The domains should have been [[1, 2], [1, 2], [3], [4]], " + 
+                "with two cells queued. Test aborted.")
+        return 1
+
+    a_board.set_domain(a_board.cells[0][2], 0b110)
+    if not propagate_line(a_board, 0, deque(), set()):
+        print("Three cells sharing two values were not detected. " + 
+                "Test aborted.")
+        return 1
+    return 0
+
+
 def calc_degree_test(a_board: Board) -> int:
     """ The function takes a Board object as the parameter and tests the 
     calc_degree function. It loops through all cells on the given board 
     and prints the degree of each cell in a grid format."""
 
-    for i in range(0, 5):
-        for j in range(0, 5):
+    for i in range(0, a_board.size):
+        for j in range(0, a_board.size):
             print(str(calc_degree(a_board, a_board.cells[i][j])) + ' ',
                     end = '')
         print('\n\n', end = '')
@@ -174,8 +246,9 @@ def select_unassigned_cell_test(a_board: Board) -> int:
             "the function select_unassigned_cell.")
     print("The degree of the cell is " + str(calc_degree(a_board, selected)) +
             ".")
-    print("There are " + str(len(selected.domain)) + " values remaining " +
-            "in the cell's domain: " + str(selected.domain))
+    print("There are " + str(domain_size(selected.domain)) + " values " +
+            "remaining in the cell's domain: " +
+            str(domain_values(selected.domain)))
     
     for i in range(0, 41):
         print('*', end='')
@@ -183,7 +256,7 @@ def select_unassigned_cell_test(a_board: Board) -> int:
 
     print("Now applying forward checking to the board:")
     print("Calling start_fc on the board...")
-    if not start_fc(a_board, a_board.cells[0][0]):
+    if not start_fc(a_board):
         print("Done.")
         selected = select_unassigned_cell(a_board)
         print("The following outcomes were obtained after forward " + 
@@ -192,8 +265,9 @@ def select_unassigned_cell_test(a_board: Board) -> int:
                 "the function select_unassigned_cell.")
         print("The degree of the cell is " +
                 str(calc_degree(a_board, selected)) + ".")
-        print("There are " + str(len(selected.domain)) + " values remaining " +
-                "in the cell's domain: " + str(selected.domain))
+        print("There are " + str(domain_size(selected.domain)) + " values " +
+                "remaining in the cell's domain: " +
+                str(domain_values(selected.domain)))
     
     else:
         print("start_fc returned 1 instead of 0.")
@@ -221,7 +295,7 @@ def order_domain_values_test(a_cell: Cell) -> int:
 def is_consistent_test(a_board: Board) -> int:
     print("Applying forward checking to the given board:")
     print("Calling start_fc on the given board...")
-    if not start_fc(a_board, a_board.cells[0][0]):
+    if not start_fc(a_board):
         print("Forward checking succeeded.")
     else:
         print("start_fc returned 1 instead of 0; test aborted.")
@@ -232,23 +306,24 @@ def is_consistent_test(a_board: Board) -> int:
             "the next variable to be assigned a value.")
     print("The cell's constraints are: " + str(selected.constr))
     
-    if not order_domain_values(selected):
+    sorted_domain = order_domain_values(selected)
+    if sorted_domain:
         print("The cell's domain values have been sorted: " +
-                str(selected.domain))
+                str(sorted_domain))
     
-    for i in range(len(selected.domain)):
-        if is_consistent(a_board, selected, selected.domain[i]):
+    for i in range(len(sorted_domain)):
+        if is_consistent(a_board, selected, sorted_domain[i]):
             print("The cell would be consistent with the rest of the " +
                     "assignment if it were assigned " + 
-                    str(selected.domain[i]) + '.')
+                    str(sorted_domain[i]) + '.')
         else:
             print("The cell would be INCONSISTENT with the rest of the " +
                     "assignment if it were assigned " +
-                    str(selected.domain[i]) + '.')
+                    str(sorted_domain[i]) + '.')
 
     others = []
-    for i in range(1,6):
-        if i not in selected.domain: others.append(i)
+    for i in range(1, a_board.size + 1):
+        if i not in sorted_domain: others.append(i)
         # Compiles a list of integers that are not in the cell's domain
 
     if len(others) > 0:
@@ -275,7 +350,7 @@ def is_consistent_test(a_board: Board) -> int:
 def backtrack_test(a_board: Board) -> int:
     print("Applying forward checking to the given board:")
     print("Calling start_fc...")
-    if not start_fc(a_board, a_board.cells[0][0]):
+    if not start_fc(a_board):
         print("Done")
     else:
         print("start_fc returned 1 instead of 0; test aborted.")
@@ -302,8 +377,8 @@ def backtrack_test(a_board: Board) -> int:
 
 def print_board_assign(a_board: Board) -> int:
     """ Prints all assigned value on the board in a grid layout. """
-    for i in range(0, 5):
-        for j in range(0, 5):
+    for i in range(0, a_board.size):
+        for j in range(0, a_board.size):
             if a_board.cells[i][j].assign == None:
                 print(0, end=' ')
             else:
@@ -312,6 +387,590 @@ def print_board_assign(a_board: Board) -> int:
 
     return 0
 
+def solve_test(filename: str) -> int:
+    """ Tests the library entry point, solve, on both forms of input it 
+    accepts: the contents of the given input file as a string, and the 
+    initial state and constraints returned by load_input. Both calls 
+    should return the same solution."""
+
+    with open(filename, 'r') as in_file:
+        from_text = solve(in_file.read())
+    [initial_state, constr] = load_input(filename)
+    from_lists = solve(initial_state, constr)
+
+    if from_text != from_lists:
+        print("solve returned different solutions for the string and " +
+                "the lists read from " + filename + ". Test aborted.")
+        return 1
+
+    if from_text == None:
+        print("solve indicates the puzzle in " + filename + 
+                " has no solution.")
+        return 0
+
+    print("solve returned the following solution to the puzzle in " + 
+            filename + ":")
+    for a_row in from_text:
+        print(' '.join(map(str, a_row)))
+    return 0
+
+
+def parse_puzzles_test(filenames: list) -> int:
+    """ Joins the given input files into one multi-puzzle string, with a 
+    header line before each of them and some stray white space added, 
+    and verifies that parse_puzzles reads back the same puzzles as 
+    load_input does for the individual files."""
+
+    text = ""
+    for filename in filenames:
+        with open(filename, 'r') as in_file:
+            text += "# " + filename + "\n" + in_file.read() + " \n\n\n"
+
+    puzzles, errors = parse_puzzles(text)
+    for error in errors:
+        print(error)
+
+    if len(puzzles) != len(filenames):
+        print("parse_puzzles read " + str(len(puzzles)) + " puzzles " + 
+                "instead of " + str(len(filenames)) + ". Test aborted.")
+        return 1
+
+    for i in range(len(filenames)):
+        if (puzzles[i][0] != filenames[i] or 
+                puzzles[i][1:] != load_input(filenames[i])):
+            print("The puzzle read from " + filenames[i] + " differs " + 
+                    "from the one returned by load_input. Test aborted.")
+            return 1
+
+    print("parse_puzzles read all " + str(len(puzzles)) + " puzzles " + 
+            "correctly.")
+
+    """ Then the same files without headers, the second one with the 
+    first row of its initial state repeated: that puzzle alone should 
+    be reported, and every other one read under its own number."""
+    texts = []
+    for filename in filenames:
+        with open(filename, 'r') as in_file:
+            texts.append(in_file.read().strip('\n'))
+    lines = texts[1].split('\n')
+    texts[1] = '\n'.join([lines[0]] + lines)
+    puzzles, errors = parse_puzzles('\n\n'.join(texts) + '\n')
+
+    if len(errors) != 1 or errors[0].number != 2:
+        print("Expected a single error, for puzzle 2, but got " + 
+                str(list(map(str, errors))) + ". Test aborted.")
+        return 1
+    expected = [["puzzle " + str(i + 1)] + load_input(filenames[i]) 
+            for i in range(len(filenames)) if i != 1]
+    if puzzles != expected:
+        print("The puzzles around the malformed one weren't all read " + 
+                "under their own numbers. Test aborted.")
+        return 1
+    print(str(errors[0]))
+    print("Test successfully completed.")
+    return 0
+
+
+def count_solutions_test(filename: str) -> int:
+    """ Counts the solutions of the puzzle in the given input file, both 
+    in full and with a limit of 2 (the uniqueness check), and verifies 
+    that iter_solutions yields that many distinct, complete grids."""
+
+    with open(filename, 'r') as in_file:
+        text = in_file.read()
+
+    total = count_solutions(text)
+    capped = count_solutions(text, limit=2)
+    print("The puzzle in " + filename + " has " + str(total) + 
+            " solution(s); with a limit of 2, count_solutions returned " + 
+            str(capped) + '.')
+    if capped != min(total, 2):
+        print("The limited count is wrong. Test aborted.")
+        return 1
+
+    solutions = list(iter_solutions(text))
+    distinct = set(str(solution) for solution in solutions)
+    if len(solutions) != total or len(distinct) != total:
+        print("iter_solutions yielded " + str(len(distinct)) + 
+                " distinct solutions instead of " + str(total) + 
+                ". Test aborted.")
+        return 1
+
+    if has_unique_solution(text):
+        print("The solution is unique.")
+    else:
+        print("The solution is NOT unique.")
+    return 0
+
+
+def generate_puzzle_test(size: int, count: int) -> int:
+    """ Generates the given number of puzzles of the given size, checks 
+    that each has exactly one solution and that format_input writes it 
+    out in a form that parse_input reads back unchanged."""
+
+    from puzzle_generator import generate_puzzle
+    for k in range(0, count):
+        [initial_state, constr] = generate_puzzle(size, random.Random(k))
+        if not has_unique_solution(initial_state, constr):
+            print("Puzzle " + str(k) + " doesn't have a unique solution. " + 
+                    "Test aborted.")
+            return 1
+        if parse_input(format_input(initial_state, constr)) != [
+                initial_state, constr]:
+            print("Puzzle " + str(k) + " didn't survive format_input. " + 
+                    "Test aborted.")
+            return 1
+
+    print(str(count) + " generated puzzles of size " + str(size) + 
+            " have unique solutions.")
+    print(format_input(initial_state, constr))
+    return 0
+
+
+def sat_solve_test(filename: str) -> int:
+    """ Solves the puzzle in the given input file with the SAT backend and 
+    checks the solution by handing it back to the backtracking solver as 
+    a fully given puzzle with the same constraints."""
+
+    from sat_solve import solve_sat
+    [initial_state, constr] = load_input(filename)
+    solution = solve_sat(initial_state, constr)
+    if solution == None:
+        print("solve_sat found no solution to the puzzle in " + filename + 
+                ". Test aborted.")
+        return 1
+
+    print_board_assign(prepare_board(solution, constr))
+    if count_solutions(solution, constr) != 1:
+        print("The grid above is not a solution to the puzzle. " + 
+                "Test aborted.")
+        return 1
+    for i in range(0, len(solution)):
+        for j in range(0, len(solution)):
+            if initial_state[i][j] != 0 and (
+                    initial_state[i][j] != solution[i][j]):
+                print("The cell " + str((i, j)) + " was given as " + 
+                        str(initial_state[i][j]) + ". Test aborted.")
+                return 1
+    print("solve_sat solved the puzzle in " + filename + '.')
+    return 0
+
+
+def backjumping_test(count: int) -> int:
+    """ Jumping back past a level, or skipping a value because of a 
+    nogood, must never lose a solution. The function makes the given 
+    number of random 4x4 puzzles, most of them with many or no 
+    solutions, and compares count_solutions with a brute-force count 
+    over all 576 Latin squares of size 4."""
+
+    from itertools import permutations
+    rows = list(permutations(range(1, 5)))
+    squares = [[a, b, c, d] for a in rows for b in rows for c in rows 
+            for d in rows if all(len(set(column)) == 4 
+            for column in zip(a, b, c, d))]
+
+    rng = random.Random(count)
+    for k in range(0, count):
+        constr = [[[NO_CONSTR] * 4 for j in range(0, 4)] 
+                for i in range(0, 4)]
+        for i in range(0, 4):
+            for j in range(0, 3):
+                relation = rng.choice([NO_CONSTR, NO_CONSTR, SMALLER, 
+                    GREATER])
+                constr[i][j][RIGHT] = relation
+                constr[i][j + 1][LEFT] = [NO_CONSTR, GREATER, 
+                        SMALLER][relation]
+                relation = rng.choice([NO_CONSTR, NO_CONSTR, SMALLER, 
+                    GREATER])
+                constr[j][i][DOWN] = relation
+                constr[j + 1][i][UP] = [NO_CONSTR, GREATER, 
+                        SMALLER][relation]
+        initial_state = [[rng.choice([0, 0, 0, 0, 1, 2, 3, 4]) 
+            for j in range(0, 4)] for i in range(0, 4)]
+
+        expected = 0
+        for square in squares:
+            if any(initial_state[i][j] not in (0, square[i][j]) 
+                    for i in range(0, 4) for j in range(0, 4)):
+                continue
+            if any((constr[i][j][RIGHT] == SMALLER and 
+                    square[i][j] > square[i][j + 1]) or 
+                    (constr[i][j][RIGHT] == GREATER and 
+                    square[i][j] < square[i][j + 1]) or 
+                    (constr[j][i][DOWN] == SMALLER and 
+                    square[j][i] > square[j + 1][i]) or 
+                    (constr[j][i][DOWN] == GREATER and 
+                    square[j][i] < square[j + 1][i]) 
+                    for i in range(0, 4) for j in range(0, 3)):
+                continue
+            expected += 1
+
+        found = count_solutions(initial_state, constr)
+        if found != expected:
+            print("Puzzle " + str(k) + " has " + str(expected) + 
+                    " solutions but count_solutions found " + str(found) + 
+                    ". Test aborted.")
+            return 1
+
+    print("count_solutions agreed with the brute-force count on " + 
+            str(count) + " random puzzles.")
+    return 0
+
+
+def dom_wdeg_test(filename: str) -> int:
+    """ Counts the solutions of the puzzle in the given input file with 
+    both heuristics, which must agree, and prints the constraints whose 
+    failure weights were raised while solving it with dom/wdeg."""
+
+    with open(filename, 'r') as in_file:
+        text = in_file.read()
+
+    counts = [count_solutions(text, heuristic=MRV), 
+            count_solutions(text, heuristic=DOM_WDEG)]
+    print("MRV found " + str(counts[0]) + " solution(s) and dom/wdeg " + 
+            str(counts[1]) + '.')
+    if counts[0] != counts[1]:
+        print("The heuristics disagree. Test aborted.")
+        return 1
+
+    a_board = prepare_board(text, heuristic=DOM_WDEG)
+    if not start_fc(a_board):
+        backtrack(a_board)
+    for number in range(len(a_board.weights)):
+        if a_board.weights[number] > 1:
+            print("Constraint " + str(number) + " has the weight " + 
+                    str(a_board.weights[number]))
+    return 0
+
+
+def buckets_test(filename: str) -> int:
+    """ Runs the search on the puzzle in the given input file and, at 
+    every solution as well as after the search has finished, compares 
+    the buckets of unassigned cells kept up to date by the Board with 
+    buckets built from scratch by scanning the board."""
+
+    [initial_state, constr] = load_input(filename)
+    a_board = prepare_board(initial_state, constr)
+    start_fc(a_board)
+
+    def rescan() -> list:
+        buckets = [set() for size in range(0, a_board.size + 1)]
+        for a_cell in a_board.flat:
+            if a_cell.assign == None:
+                buckets[domain_size(a_cell.domain)].add(a_cell.index)
+        return buckets
+
+    before = rescan()
+    if a_board.buckets != before:
+        print("The buckets are wrong after start_fc. Test aborted.")
+        return 1
+    for solved in search(a_board):
+        if a_board.buckets != rescan():
+            print("The buckets are wrong at a solution. Test aborted.")
+            return 1
+    if a_board.buckets != before:
+        print("The buckets were not restored by undo. Test aborted.")
+        return 1
+    print("The buckets matched the board throughout the search.")
+    return 0
+
+
+def least_constraining_test() -> int:
+    """ On an empty 4x4 board whose top-left cell must be greater than 
+    its right neighbor, the top-left cell keeps the values [2, 3, 4] 
+    and the neighbor [1, 2, 3]. Taking 4 removes a value from the five 
+    other peers only, taking 3 from all six peers, and taking 2 removes 
+    both 2 and 3 from the neighbor, so the least constraining order is 
+    [4, 3, 2]."""
+
+    horizontal = [['>', '0', '0'], ['0', '0', '0'], ['0', '0', '0'], 
+            ['0', '0', '0']]
+    vertical = [['0', '0', '0', '0'] for i in range(0, 3)]
+    a_board = prepare_board([[0] * 4 for i in range(0, 4)], 
+            build_constr(4, horizontal, vertical), 
+            value_order=LEAST_CONSTRAINING)
+    start_fc(a_board)
+
+    a_cell = a_board.cells[0][0]
+    print("The removals per value are " + 
+            str(count_removals(a_board, a_cell)[1:5]))
+    found = order_domain_values(a_cell, a_board)
+    print("The values are ordered as " + str(found))
+    if found != [4, 3, 2]:
+        print("They should have been ordered as [4, 3, 2]. Test aborted.")
+        return 1
+    return 0
+
+
+def parallel_test(filename: str, jobs: int) -> int:
+    """ Counts the solutions of the puzzle in the given input file with 
+    the given number of worker processes and a tiny node budget, so that 
+    the subproblems are split up again and again, and compares the count 
+    and the solution with those of the single-process solver."""
+
+    from parallel_solve import parallel_solve, parallel_count
+    [initial_state, constr] = load_input(filename)
+    expected = count_solutions(initial_state, constr)
+    stats = SearchStats()
+    found = parallel_count(initial_state, constr, jobs=jobs, budget=3, 
+            stats=stats)
+    print("count_solutions found " + str(expected) + 
+            " solution(s) and parallel_count " + str(found) + '.')
+    if found != expected or stats.solutions != expected:
+        print("The counts disagree. Test aborted.")
+        return 1
+
+    solution = parallel_solve(initial_state, constr, jobs=jobs, budget=3)
+    if (solution == None) != (expected == 0) or (
+            solution != None and count_solutions(solution, constr) != 1):
+        print("parallel_solve returned " + str(solution) + 
+                ", which is not a solution. Test aborted.")
+        return 1
+    print("parallel_solve found a solution.")
+    return 0
+
+
+def parallel_bystander_test(jobs: int) -> int:
+    """ Keeps an unrelated child process alive for half a second while 
+    parallel_count counts the 32256 solutions of an empty 5x5 board with 
+    1 given in the first cell, using the given number of worker 
+    processes. Each subproblem takes longer than a poll of the results, 
+    so the workers are checked after the child has exited, and it must 
+    not be taken for a dead worker."""
+
+    import time
+    from multiprocessing import Process
+    from parallel_solve import parallel_count
+    initial_state = [[0] * 5 for i in range(0, 5)]
+    initial_state[0][0] = 1
+    constr = [[[NO_CONSTR] * 4 for j in range(0, 5)] for i in range(0, 5)]
+
+    bystander = Process(target=time.sleep, args=(0.5,))
+    bystander.start()
+    try:
+        found = parallel_count(initial_state, constr, jobs=jobs, 
+                budget=10**9)
+    except RuntimeError as error:
+        print("parallel_count raised \"" + str(error) + "\" after the " + 
+                "unrelated child process exited. Test aborted.")
+        return 1
+    finally:
+        bystander.join()
+
+    print("parallel_count found " + str(found) + " solutions.")
+    if found != 32256:
+        print("It should have found 32256. Test aborted.")
+        return 1
+    return 0
+
+
+def portfolio_test(filename: str) -> int:
+    """ Checks that each of the 16 symmetries used to seed the portfolio 
+    keeps the number of solutions of the puzzle in the given input file, 
+    and that restore_solution turns the solution of each transformed 
+    puzzle into one of the original. Then races the portfolio on it."""
+
+    from portfolio_solve import (transform_puzzle, restore_solution, 
+            portfolio_solve)
+    [initial_state, constr] = load_input(filename)
+    expected = count_solutions(initial_state, constr)
+    for seed in range(0, 16):
+        [new_state, new_constr] = transform_puzzle(initial_state, constr, 
+                seed)
+        if count_solutions(new_state, new_constr) != expected:
+            print("The symmetry " + str(seed) + " changed the number of " + 
+                    "solutions. Test aborted.")
+            return 1
+        solution = solve(new_state, new_constr)
+        if solution != None and count_solutions(
+                restore_solution(solution, seed), constr) != 1:
+            print("The solution of symmetry " + str(seed) + " was not " + 
+                    "restored to a solution. Test aborted.")
+            return 1
+
+    solution, name, seconds = portfolio_solve(initial_state, constr, 
+            jobs=4)
+    print("The portfolio was won by " + name + " in " + str(seconds) + 
+            " s.")
+    print_board_assign(prepare_board(solution, constr))
+    return 0
+
+
+def solution_cache_test(filename: str) -> int:
+    """ Solves all 16 symmetric variants of the puzzle in the given input 
+    file through a SolutionCache kept on disk, checking that only the 
+    first of them is searched and that every answer solves its own 
+    variant. Then reopens the cache and checks that the solution has 
+    survived on disk."""
+
+    import os
+    import tempfile
+    from portfolio_solve import transform_puzzle
+    from solution_cache import SolutionCache
+    [initial_state, constr] = load_input(filename)
+    path = os.path.join(tempfile.mkdtemp(), "cache.db")
+
+    cache = SolutionCache(100, path)
+    for seed in range(0, 16):
+        [new_state, new_constr] = transform_puzzle(initial_state, constr, 
+                seed)
+        solution = cache.solve(new_state, new_constr)
+        if solution == None or count_solutions(solution, new_constr) != 1:
+            print("The cached answer to symmetry " + str(seed) + " is " + 
+                    "not a solution. Test aborted.")
+            return 1
+    print("Hits: " + str(cache.hits) + ", misses: " + str(cache.misses) + 
+            " (expected 15 and 1)")
+    cache.close()
+
+    cache = SolutionCache(100, path)
+    print_board_assign(prepare_board(cache.solve(initial_state, constr), 
+        constr))
+    print("Hits after reopening: " + str(cache.hits) + " (expected 1)")
+    cache.close()
+    os.remove(path)
+    return 0
+
+
+def benchmark_test() -> int:
+    """ Runs the benchmark corpus once and checks that every puzzle in it 
+    is answered correctly, i.e. that the puzzles of the unsat tier have 
+    no solution and all the others are solved."""
+
+    from benchmark import CORPUS, run_corpus
+    results = run_corpus(CORPUS, 1)
+    wrong = [name for name in results if not results[name]["correct"]]
+    if wrong:
+        print("Wrong answers: " + ", ".join(wrong) + ". Test aborted.")
+        return 1
+    print("All " + str(len(results)) + " puzzles of the corpus were " + 
+            "answered correctly.")
+    return 0
+
+
+def search_stats_test(filename: str) -> int:
+    """ Counts the solutions of the puzzle in the given input file with a 
+    SearchStats object attached, prints its counters, and checks that 
+    they agree with the search: one solution counted per solution found, 
+    at least one node per cell that had to be searched, and the same 
+    node count as Board.nodes when the search is run by hand. Then 
+    checks that has_unique_solution fills the counters too, and that 
+    adding up two SearchStats objects keeps the deepest level."""
+
+    [initial_state, constr] = load_input(filename)
+    stats = SearchStats()
+    count = count_solutions(initial_state, constr, stats=stats)
+    for key, value in stats.as_dict().items():
+        print(key + ": " + str(value))
+
+    a_board = initialize_board(initial_state, constr)
+    start_fc(a_board)
+    empty = sum(1 for a_cell in a_board.flat if a_cell.assign == None)
+    for solved in search(a_board):
+        pass
+    if stats.solutions != count or stats.nodes != a_board.nodes:
+        print("The counters disagree with the search. Test aborted.")
+        return 1
+    if count > 0 and stats.max_depth < empty:
+        print("The search went less deep than the number of empty " + 
+                "cells. Test aborted.")
+        return 1
+
+    unique_stats = SearchStats()
+    has_unique_solution(initial_state, constr, unique_stats)
+    if unique_stats.solutions != min(count, 2) or unique_stats.nodes == 0:
+        print("has_unique_solution didn't fill the counters. " + 
+                "Test aborted.")
+        return 1
+    total = SearchStats()
+    total.add(stats)
+    total.add(unique_stats)
+    if total.nodes != stats.nodes + unique_stats.nodes or (
+            total.max_depth != max(stats.max_depth, 
+                unique_stats.max_depth)):
+        print("SearchStats.add got the totals wrong. Test aborted.")
+        return 1
+    print("Test successfully completed.")
+    return 0
+
+
+def search_hooks_test(filename: str) -> int:
+    """ Counts the solutions of the puzzle in the given input file with 
+    SearchHooks that count the events, and checks that they match the 
+    search: one assignment per node, as many levels left as entered, 
+    one solution event per solution. Then traces a solve and prints the 
+    time of each phase."""
+
+    from trace_solve import trace_solve
+
+    class CountingHooks(SearchHooks):
+        def __init__(self):
+            self.counts = {"enter": 0, "assign": 0, "wipeout": 0, 
+                "solution": 0, "exit": 0}
+        def on_node_enter(self, a_board, level):
+            self.counts["enter"] += 1
+        def on_assign(self, a_board, level, a_cell, value):
+            self.counts["assign"] += 1
+        def on_wipeout(self, a_board, a_cell):
+            self.counts["wipeout"] += 1
+        def on_solution(self, a_board):
+            self.counts["solution"] += 1
+        def on_node_exit(self, a_board, level, conflict):
+            self.counts["exit"] += 1
+
+    [initial_state, constr] = load_input(filename)
+    hooks = CountingHooks()
+    stats = SearchStats()
+    count = count_solutions(initial_state, constr, stats=stats, 
+            hooks=hooks)
+    print(hooks.counts)
+    if hooks.counts["assign"] != stats.nodes or \
+            hooks.counts["enter"] != hooks.counts["exit"] or \
+            hooks.counts["solution"] != count or \
+            hooks.counts["wipeout"] != stats.wipeouts:
+        print("The events don't match the search. Test aborted.")
+        return 1
+
+    solution, tracer = trace_solve(initial_state, constr)
+    for phase, seconds in tracer.phase_seconds().items():
+        print(phase + ": " + str(seconds) + " s")
+    print("Test successfully completed.")
+    return 0
+
+
+def stream_input_test() -> int:
+    """ Feeds solve_stream lines that don't describe a puzzle (a grid 
+    that isn't square, an empty one, values out of range or not integers, 
+    unknown signs, constraint rows of the wrong shape) and checks that 
+    each of them produces an error rather than a solution."""
+
+    from stream_solve import solve_stream
+    lines = ['{"grid": [[0, 0, 0], [0, 1]]}', 
+        '[]', 
+        '{"grid": []}', 
+        '{"grid": [[0, 0], [0, 5]]}', 
+        '{"grid": [[0, 0], [0, -1]]}', 
+        '{"grid": [[true, 0], [0, 0]]}', 
+        '{"grid": [[0, 0], [0, 1.0]]}', 
+        '{"grid": [[0, 0], [0, 0]], "horizontal": ["x", "0"]}', 
+        '{"grid": [[0, 0], [0, 0]], "horizontal": ["<"]}', 
+        '{"grid": [[0, 0], [0, 0]], "vertical": ["0 0 0"]}']
+    for result in solve_stream(lines):
+        if "error" not in result:
+            print("Line " + str(result["id"]) + " was answered with " + 
+                    str(result["solution"]) + ". Test aborted.")
+            return 1
+        print(str(result["id"]) + ": " + result["error"])
+
+    good = '{"grid": [[0, 0], [0, 1]], "horizontal": ["<", "0"]}'
+    for result in solve_stream([good]):
+        if result.get("solution") != [[1, 2], [2, 1]]:
+            print("A valid puzzle was rejected. Test aborted.")
+            return 1
+    print("Test successfully completed.")
+    return 0
+
+
 #load_input_test()
 #initialize_board_test()
 [initial_state, constr] = load_input("Input2.txt")
@@ -320,8 +979,27 @@ a_board = initialize_board(initial_state, constr)
 #fct_ret = forward_checking_test(a_board)
 #print_board(a_board)
 #calc_degree_test(a_board)
+#chain_bounds_test(7)
+#propagate_line_test()
 #select_unassigned_cell_test(a_board)
 #is_complete_test(a_board)
 #order_domain_values_test(a_board.cells[0][0])
 #is_consistent_test(a_board)
 backtrack_test(a_board)
+#solve_test("Input3.txt")
+#count_solutions_test("Input0.txt")
+#parse_puzzles_test(["Input0.txt", "input1.txt", "Input2.txt", "Input3.txt"])
+#generate_puzzle_test(6, 10)
+#sat_solve_test("Input3.txt")
+#backjumping_test(500)
+#dom_wdeg_test("Input0.txt")
+#buckets_test("Input0.txt")
+#least_constraining_test()
+#parallel_test("Input0.txt", 4)
+#parallel_bystander_test(2)
+#portfolio_test("Input3.txt")
+#solution_cache_test("Input3.txt")
+#benchmark_test()
+#search_stats_test("Input0.txt")
+#search_hooks_test("Input0.txt")
+#stream_input_test()
@@ -0,0 +1,271 @@
+""" Solves many puzzle files in one non-interactive run, spreading the
+puzzles over all cores with a process pool. Each input file is written
+out as the matching output file (e.g. Input3.txt -> Output3.txt) or, if
+requested, all solutions are gathered in a single combined file. A
+timing summary of every puzzle is printed at the end or saved as CSV.
+
+Usage:
+    python batch_solve.py PUZZLES [-o OUT_DIR] [--combined FILE]
+            [--summary FILE] [-j JOBS] [--chunksize N]
+
+PUZZLES is either a directory, in which case every Input*.txt file in
+it is solved, or a glob pattern such as "puzzles/Input*.txt". A file may
+hold many puzzles separated by blank lines or "# name" header lines, in
+which case its output file lists the solutions under the same headers."""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from Futoshiki import load_puzzles, solve
+
+
+def find_inputs(pattern: str) -> list:
+    """ Returns the sorted list of input filenames named by the given
+    directory or glob pattern."""
+
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "[Ii]nput*.txt")
+        # The repository itself uses both "Input1.txt" and "input1.txt"
+    return sorted(glob.glob(pattern))
+
+
+def output_name(in_filename: str, out_dir: str = None) -> str:
+    """ Returns the output filename for the given input file: "Input" at
+    the start of the name is replaced with "Output", and any other name
+    is prefixed with "Output_". The file is placed in out_dir if given
+    and next to the input file otherwise."""
+
+    directory, name = os.path.split(in_filename)
+    if name.lower().startswith("input"):
+        name = "Output" + name[len("input"):]
+    else:
+        name = "Output_" + name
+
+    if out_dir != None:
+        directory = out_dir
+    return os.path.join(directory, name)
+
+
+def solve_file(job: tuple) -> list:
+    """ Runs in the worker processes. "job" is a tuple of the input
+    filename and the output filename (None if the solutions should only
+    be returned to the parent process). The file may contain any number
+    of puzzles (see parse_puzzles in Futoshiki.py). Returns a list with
+    one tuple per puzzle: the input filename, the name of the puzzle,
+    the solution as a list of rows (None if the puzzle has no solution),
+    the time spent in seconds and an error message (None if the puzzle
+    was read and searched without error)."""
+
+    in_filename, out_filename = job
+    try:
+        puzzles, errors = load_puzzles(in_filename)
+    except OSError as error:
+        # A missing file only fails its own entry rather than the
+        # whole batch
+        return [(in_filename, None, None, 0.0,
+            type(error).__name__ + ": " + str(error))]
+
+    failed = {}
+    for error in errors:
+        failed[error.number] = error
+
+    results = []
+    remaining = iter(puzzles)
+    for number in range(1, len(puzzles) + len(errors) + 1):
+        # Reports the puzzles and the errors in the order in which
+        # they appear in the file
+        if number in failed:
+            results.append((in_filename, failed[number].name, None, 0.0,
+                "PuzzleFormatError: " + failed[number].detail))
+            continue
+
+        [name, initial_state, constr] = next(remaining)
+        start = time.perf_counter()
+        try:
+            solution = solve(initial_state, constr)
+        except Exception as error:
+            # A puzzle the solver can't handle only fails its own entry
+            # rather than the rest of the file and the whole batch
+            results.append((in_filename, name, None,
+                time.perf_counter() - start,
+                type(error).__name__ + ": " + str(error)))
+            continue
+        results.append((in_filename, name, solution,
+            time.perf_counter() - start, None))
+
+    if out_filename != None:
+        if len(results) == 1:
+            if results[0][2] != None:
+                write_grid(results[0][2], out_filename)
+                # A file with a single puzzle gets an output file in
+                # the same format as generate_output
+        else:
+            write_solutions(results, out_filename, False)
+
+    return results
+
+
+def batch_solve(filenames: list, out_dir: str = None, combined: str = None,
+        jobs: int = None, chunksize: int = None) -> list:
+    """ Solves every puzzle in "filenames" with a pool of "jobs" worker
+    processes (one per core by default) and returns the list of results
+    of all puzzles in the same order, each in the format returned by
+    solve_file. The files are dispatched to the workers in chunks of
+    "chunksize" files, which keeps the inter-process traffic low when
+    there are tens of thousands of small files."""
+
+    if jobs == None:
+        jobs = os.cpu_count() or 1
+    if chunksize == None:
+        chunksize = max(1, len(filenames) // (jobs * 4))
+        # About four chunks per worker, so that a few slow puzzles
+        # don't leave the other workers idle at the end of the batch
+
+    if out_dir != None:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if combined != None:
+        tasks = [(in_filename, None) for in_filename in filenames]
+        # The solutions are sent back and written into the combined
+        # file by this process instead
+    else:
+        tasks = [(in_filename, output_name(in_filename, out_dir))
+                for in_filename in filenames]
+
+    results = []
+    with Pool(jobs) as pool:
+        for file_results in pool.imap(solve_file, tasks, chunksize):
+            results.extend(file_results)
+
+    if combined != None:
+        write_solutions(results, combined, True)
+    return results
+
+
+def write_grid(solution: list, filename: str) -> int:
+    """ Writes a single solution in the format of the output files."""
+
+    with open(filename, 'w') as out_file:
+        for a_row in solution:
+            out_file.write(' '.join(map(str, a_row)) + '\n')
+
+    return 0
+
+
+def write_solutions(results: list, filename: str,
+        with_filename: bool) -> int:
+    """ Writes several solutions into one file. Each solution is preceded
+    by a header line naming its puzzle (and, if "with_filename" is True,
+    its input file), and a puzzle without a solution (or one that failed)
+    is reported on its header line."""
+
+    with open(filename, 'w') as out_file:
+        for in_filename, name, solution, seconds, error in results:
+            header = "# " + result_label(in_filename, name, with_filename)
+            if error != None:
+                out_file.write(header + " error: " + error + '\n\n')
+                continue
+            if solution == None:
+                out_file.write(header + " no solution\n\n")
+                continue
+
+            out_file.write(header + '\n')
+            for a_row in solution:
+                out_file.write(' '.join(map(str, a_row)) + '\n')
+            out_file.write('\n')
+
+    return 0
+
+
+def result_label(in_filename: str, name: str, with_filename: bool) -> str:
+    """ Names a puzzle in the summaries and combined files."""
+    if not with_filename:
+        return str(name)
+    if name == None:
+        return in_filename
+    return in_filename + ": " + name
+
+
+def write_summary(results: list, filename: str) -> int:
+    """ Saves the per-puzzle timing summary as a CSV file."""
+
+    with open(filename, 'w', newline='') as out_file:
+        writer = csv.writer(out_file)
+        writer.writerow(["input", "puzzle", "status", "seconds"])
+        for in_filename, name, solution, seconds, error in results:
+            writer.writerow([in_filename, name,
+                result_status(solution, error), "%.6f" % seconds])
+
+    return 0
+
+
+def result_status(solution: list, error: str) -> str:
+    """ Describes the outcome of a puzzle in a few words."""
+    if error != None:
+        return "error: " + error
+    if solution == None:
+        return "no solution"
+    return "solved"
+
+
+def print_summary(results: list, wall_time: float) -> int:
+    """ Prints one line per puzzle followed by the totals of the batch."""
+
+    for in_filename, name, solution, seconds, error in results:
+        print("%-40s %-14s %10.6f s" % (
+            result_label(in_filename, name, True),
+            result_status(solution, error), seconds))
+
+    solved = sum(1 for result in results if result[2] != None)
+    times = [result[3] for result in results]
+    print("%d puzzles, %d solved, %.3f s wall time" % (len(results),
+        solved, wall_time))
+    if times:
+        print("per puzzle: mean %.6f s, max %.6f s" % (
+            sum(times) / len(times), max(times)))
+
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+            description="Solve many Futoshiki puzzle files in parallel.")
+    parser.add_argument("puzzles",
+            help="a directory of Input*.txt files or a glob pattern")
+    parser.add_argument("-o", "--out-dir", default=None,
+            help="directory for the Output*.txt files (default: next to "
+            "each input file)")
+    parser.add_argument("--combined", default=None,
+            help="write all solutions into this single file instead")
+    parser.add_argument("--summary", default=None,
+            help="save the per-puzzle timing summary as CSV")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+            help="number of worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=None,
+            help="puzzles dispatched to a worker at a time")
+    args = parser.parse_args()
+
+    filenames = find_inputs(args.puzzles)
+    if not filenames:
+        print("No puzzle files match " + args.puzzles)
+        return 1
+
+    start = time.perf_counter()
+    results = batch_solve(filenames, args.out_dir, args.combined,
+            args.jobs, args.chunksize)
+    wall_time = time.perf_counter() - start
+
+    if args.summary != None:
+        write_summary(results, args.summary)
+    else:
+        print_summary(results, wall_time)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
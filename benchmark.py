@@ -0,0 +1,345 @@
+""" Runs the solver over a fixed corpus of puzzles and compares the results
+with a stored baseline, so that the effect of a change to the solver can
+be measured rather than guessed. For every puzzle, it records
+
+- the wall time of solving it (the best of several runs over the whole
+  corpus, since the shortest time is the one least disturbed by the
+  rest of the machine),
+- the number of search nodes, i.e. the assignments made by search (see
+  Board.nodes), which doesn't depend on the machine at all,
+- and the peak memory allocated while solving it, measured with
+  tracemalloc in a separate run so that tracing doesn't slow down the
+  timed ones.
+
+The corpus is a multi-puzzle file (see parse_puzzles in Futoshiki.py)
+in which every puzzle is named "SIZExSIZE-TIER-NUMBER", the tier being
+"easy", "hard" or "unsat". The puzzles of the unsat tier must have no
+solution and all the others must be solved; a wrong answer is always a
+failure. The corpus is versioned by its file name, and a baseline
+records the corpus it was measured on.
+
+A change is a regression if the number of nodes or the peak memory of a
+puzzle grows by more than the threshold (10% by default) over the
+baseline, or if the total time of a tier grows by more than the time
+threshold (30% by default). Times are compared per tier rather than per
+puzzle because a single puzzle takes a few milliseconds at most, which
+is too short to be timed reliably, and with a looser threshold because
+the speed of a shared machine easily varies by 20% from one run to the
+next; the nodes, which don't vary at all, are what catches a change to
+the search itself.
+
+Usage:
+    python benchmark.py [--corpus FILE] [--baseline FILE] [--update]
+            [--threshold SHARE] [--time-threshold SHARE] [--repeat N]
+    python benchmark.py --build-corpus FILE
+
+The exit status is 1 if there's a wrong answer or a regression."""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from Futoshiki import (SMALLER, GREATER, UP, DOWN, LEFT, RIGHT, format_input,
+        load_puzzles, prepare_board, start_fc, backtrack, get_solution,
+        count_solutions)
+
+
+CORPUS = os.path.join("benchmarks", "corpus_v1.txt")
+BASELINE = os.path.join("benchmarks", "baseline.json")
+# The default files, relative to the directory of this script
+
+TIERS = ("easy", "hard", "unsat")
+
+THRESHOLD = 0.1
+TIME_THRESHOLD = 0.3
+# The growth over the baseline beyond which the nodes or the peak memory
+# of a puzzle, or the time of a tier, is a regression
+
+MIN_SECONDS = 0.005
+# Growth in the time of a tier smaller than this is ignored as noise
+
+
+def run_puzzle(initial_state: list, constr: list) -> tuple:
+    """ Solves the puzzle the way solve in Futoshiki.py does. Returns a
+    tuple of the solution (None if there's none) and the number of
+    search nodes."""
+
+    a_board = prepare_board(initial_state, constr)
+    if start_fc(a_board):
+        return (None, a_board.nodes)
+    if backtrack(a_board):
+        return (get_solution(a_board), a_board.nodes)
+    return (None, a_board.nodes)
+
+
+def measure(name: str, initial_state: list, constr: list) -> dict:
+    """ Returns the measurements of one puzzle as a dictionary with the
+    keys "seconds" (of a single run), "nodes", "peak_kb" and "correct"."""
+
+    start = time.perf_counter()
+    solution, nodes = run_puzzle(initial_state, constr)
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    # Otherwise the cyclic garbage left over from earlier puzzles may or
+    # may not be collected during the run, which moves the peak by as
+    # much as 80%
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    run_puzzle(initial_state, constr)
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    if name.split("-")[1] == "unsat":
+        correct = solution == None
+    else:
+        correct = solution != None and count_solutions(solution, constr) == 1
+        # A complete grid is a solution exactly if it solves itself
+    return {"seconds": seconds, "nodes": nodes,
+            "peak_kb": round(peak / 1024, 1), "correct": correct}
+
+
+def run_corpus(filename: str, repeat: int) -> dict:
+    """ Measures every puzzle of the corpus. Returns a dictionary from
+    the name of each puzzle to its measurements (see measure). The
+    corpus is timed "repeat" times over and the best time of each puzzle
+    counts; going over the whole corpus between the runs of a puzzle,
+    rather than running it several times in a row, keeps a passing
+    slowdown of the machine from spoiling all of its runs."""
+
+    puzzles, errors = load_puzzles(filename)
+    if errors:
+        raise ValueError("The corpus " + filename + " can't be read: " +
+                str(errors[0]))
+    results = {}
+    for name, initial_state, constr in puzzles:
+        results[name] = measure(name, initial_state, constr)
+
+    for run in range(1, repeat):
+        for name, initial_state, constr in puzzles:
+            start = time.perf_counter()
+            run_puzzle(initial_state, constr)
+            seconds = time.perf_counter() - start
+            if seconds < results[name]["seconds"]:
+                results[name]["seconds"] = seconds
+
+    for name in results:
+        results[name]["seconds"] = round(results[name]["seconds"], 6)
+    return results
+
+
+def tier_seconds(results: dict) -> dict:
+    """ Adds up the times of the puzzles of each tier."""
+
+    totals = dict((tier, 0.0) for tier in TIERS)
+    for name in results:
+        totals[name.split("-")[1]] += results[name]["seconds"]
+    return totals
+
+
+def compare(results: dict, baseline: dict, threshold: float,
+        time_threshold: float) -> list:
+    """ Returns the list of regressions of the results against the
+    baseline, each described by a line of text (empty if there's none).
+    Puzzles missing from either side are skipped."""
+
+    regressions = []
+    old_results = baseline["puzzles"]
+    for name in results:
+        if name not in old_results:
+            continue
+        for key in ("nodes", "peak_kb"):
+            old = old_results[name][key]
+            new = results[name][key]
+            if new > old * (1 + threshold):
+                regressions.append("%s: %s %s -> %s" % (name, key, old, new))
+
+    old_totals = tier_seconds(dict((name, old_results[name])
+        for name in results if name in old_results))
+    new_totals = tier_seconds(dict((name, results[name])
+        for name in results if name in old_results))
+    for tier in TIERS:
+        old = old_totals[tier]
+        new = new_totals[tier]
+        if new > old * (1 + time_threshold) and new - old > MIN_SECONDS:
+            regressions.append("%s tier: seconds %.6f -> %.6f" % (tier,
+                old, new))
+    return regressions
+
+
+def print_results(results: dict, baseline: dict) -> None:
+    """ Prints a table of the results, next to the baseline if any."""
+
+    old_results = {}
+    if baseline != None:
+        old_results = baseline["puzzles"]
+    print("%-16s %12s %8s %10s %s" % ("puzzle", "seconds", "nodes",
+        "peak KiB", "(baseline)"))
+    for name in results:
+        result = results[name]
+        line = "%-16s %12.6f %8d %10.1f" % (name, result["seconds"],
+                result["nodes"], result["peak_kb"])
+        if name in old_results:
+            old = old_results[name]
+            line += "  (%.6f %d %.1f)" % (old["seconds"], old["nodes"],
+                    old["peak_kb"])
+        if not result["correct"]:
+            line += "  WRONG ANSWER"
+        print(line)
+
+    totals = tier_seconds(results)
+    print("Total seconds: " + ", ".join("%s %.6f" % (tier, totals[tier])
+        for tier in TIERS))
+
+
+def flip_sign(constr: list, rng: random.Random) -> None:
+    """ Works with build_corpus. Turns one randomly chosen sign of the
+    constraints around (both of its arcs)."""
+
+    size = len(constr)
+    signs = [(i, j, direction) for i in range(0, size)
+            for j in range(0, size) for direction in (RIGHT, DOWN)
+            if constr[i][j][direction]]
+    i, j, direction = rng.choice(signs)
+    constr[i][j][direction] = SMALLER + GREATER - constr[i][j][direction]
+    if direction == RIGHT:
+        constr[i][j+1][LEFT] = SMALLER + GREATER - constr[i][j+1][LEFT]
+    else:
+        constr[i+1][j][UP] = SMALLER + GREATER - constr[i+1][j][UP]
+
+
+def build_corpus(filename: str, version: str = "v1") -> None:
+    """ Writes a new corpus into the given file. All puzzles come from
+    generators seeded with the version and the name of the puzzle, and
+    for every size from 4x4 to 9x9 the corpus holds
+
+    - 3 easy puzzles, generated with the default share of signs,
+    - 3 hard puzzles, the ones of 12 candidates with many signs that
+      take the solver the most nodes,
+    - 2 unsat puzzles, made by turning one sign of a generated puzzle
+      around, preferring those whose lack of a solution can't be told
+      by the initial propagation alone.
+
+    The choice of hard and unsat puzzles depends on the solver at the
+    time the corpus is built, so a rebuilt corpus is a new version,
+    never a replacement of the old one."""
+
+    from puzzle_generator import generate_puzzle
+
+    puzzles = []
+    for size in range(4, 10):
+        prefix = "%dx%d" % (size, size)
+        for number in range(1, 4):
+            rng = random.Random("%s-%s-easy-%d" % (version, prefix, number))
+            puzzles.append((prefix + "-easy-" + str(number),
+                generate_puzzle(size, rng)))
+
+        candidates = []
+        for number in range(0, 12):
+            rng = random.Random("%s-%s-hard-%d" % (version, prefix, number))
+            [initial_state, constr] = generate_puzzle(size, rng, 0.5)
+            nodes = run_puzzle(initial_state, constr)[1]
+            candidates.append((-nodes, number, [initial_state, constr]))
+        candidates.sort(key=lambda candidate: candidate[:2])
+        for number in range(1, 4):
+            puzzles.append((prefix + "-hard-" + str(number),
+                candidates[number - 1][2]))
+
+        candidates = []
+        searched = 0
+        number = 0
+        while searched < 2 and number < 100:
+            rng = random.Random("%s-%s-unsat-%d" % (version, prefix, number))
+            [initial_state, constr] = generate_puzzle(size, rng, 0.5)
+            flip_sign(constr, rng)
+            if count_solutions(initial_state, constr, 1) == 0:
+                a_board = prepare_board(initial_state, constr)
+                refuted = start_fc(a_board)
+                candidates.append((refuted, number, [initial_state, constr]))
+                if not refuted:
+                    searched += 1
+            number += 1
+        candidates.sort(key=lambda candidate: candidate[:2])
+        for number in range(1, 3):
+            puzzles.append((prefix + "-unsat-" + str(number),
+                candidates[number - 1][2]))
+
+    with open(filename, 'w') as out_file:
+        for name, [initial_state, constr] in puzzles:
+            out_file.write("# " + name + '\n' +
+                    format_input(initial_state, constr) + '\n')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+            description="Benchmark the solver against a stored baseline.")
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument("--corpus", default=os.path.join(here, CORPUS),
+            help="the corpus of puzzles (default: " + CORPUS + ")")
+    parser.add_argument("--baseline", default=os.path.join(here, BASELINE),
+            help="the baseline JSON file (default: " + BASELINE + ")")
+    parser.add_argument("--update", action="store_true",
+            help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+            help="the growth of nodes or memory that counts as a " +
+            "regression (default: 0.1)")
+    parser.add_argument("--time-threshold", type=float,
+            default=TIME_THRESHOLD, help="the growth of the time of a " +
+            "tier that counts as a regression (default: 0.3)")
+    parser.add_argument("--repeat", type=int, default=5,
+            help="timed runs over the corpus, the best counts (default: 5)")
+    parser.add_argument("--build-corpus", default=None, metavar="FILE",
+            help="write a new corpus into FILE and exit")
+    args = parser.parse_args()
+
+    if args.build_corpus != None:
+        build_corpus(args.build_corpus)
+        return 0
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as in_file:
+            baseline = json.load(in_file)
+        if baseline["corpus"] != os.path.basename(args.corpus):
+            print("The baseline was measured on " + baseline["corpus"] +
+                    ", not on " + os.path.basename(args.corpus) + ".")
+            baseline = None
+
+    results = run_corpus(args.corpus, max(1, args.repeat))
+    print_results(results, baseline)
+    status = 0
+
+    wrong = [name for name in results if not results[name]["correct"]]
+    if wrong:
+        print("Wrong answers: " + ", ".join(wrong))
+        status = 1
+
+    if args.update:
+        with open(args.baseline, 'w') as out_file:
+            json.dump({"corpus": os.path.basename(args.corpus),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "puzzles": results}, out_file, indent=1)
+            out_file.write('\n')
+        print("Baseline written to " + args.baseline)
+    elif baseline != None:
+        regressions = compare(results, baseline, args.threshold,
+                args.time_threshold)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print("  " + line)
+            status = 1
+        else:
+            print("No regressions.")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+""" Solves a single hard puzzle on many cores at once by splitting its
+search tree into independent subproblems. After the initial propagation,
+the tree is expanded breadth-first until there are a few subproblems per
+worker, and each subproblem is searched in a process of its own. A
+worker that has used up its node budget without finishing hands the
+unexplored rest of its subproblem back as new subproblems, which go to
+whichever workers are idle, so that a single hard branch is spread over
+the whole pool instead of keeping one core busy while the others wait.
+As soon as a worker finds a solution, the whole pool is cancelled; when
+counting solutions, the counts of all subproblems are added up instead.
+
+A subproblem is the list of (cell index, value) assignments that lead
+from the propagated puzzle to the root of its subtree, so each worker
+builds the board once and only replays those assignments.
+
+Usage:
+    python parallel_solve.py INPUT [-o OUTPUT] [-j JOBS] [--count]
+            [--limit N] [--budget NODES] [--timeout SECONDS]"""
+
+import argparse
+import os
+import queue
+import sys
+import time
+from multiprocessing import Pool, active_children
+
+from Futoshiki import (MRV, ASCENDING, SearchStats, load_input,
+        normalize_puzzle, prepare_board, start_fc, select_unassigned_cell,
+        order_domain_values, is_consistent, is_complete, search,
+        get_solution, solve, count_solutions)
+
+
+BUDGET = 20000
+# The number of assignments a worker makes in a subproblem before it
+# hands the rest of the subproblem back to be split up
+
+POLL_SECONDS = 1.0
+# How long to wait for a result before checking that the workers are
+# still alive and that the time limit, if any, hasn't been reached
+
+
+_board = None
+_base = 0
+# The board of the puzzle in each worker process, propagated once, and
+# the length of its trail after that propagation
+
+
+def init_worker(initial_state: list, constr: list, heuristic: int,
+        value_order: int) -> None:
+    """ Runs once in each worker process of the pool and sets up the
+    board that all of its subproblems are searched on."""
+
+    global _board, _base
+    _board = prepare_board(initial_state, constr, heuristic, value_order)
+    start_fc(_board)
+    _base = len(_board.trail)
+
+
+def apply_path(a_board, path: list) -> int:
+    """ Replays the assignments leading to a subproblem, each followed
+    by propagation. Returns 1 if one of them fails and 0 otherwise."""
+
+    for index, value in path:
+        a_cell = a_board.flat[index]
+        a_board.set_assign(a_cell, value)
+        if start_fc(a_board, a_cell):
+            return 1
+    return 0
+
+
+def explore(a_board, path: list, budget: int, enumerate_all: bool,
+        limit: int = None) -> tuple:
+    """ Searches the subtree below the given path on the given board,
+    which must hold the path already, making at most "budget"
+    assignments. Stops at the first solution unless "enumerate_all" is
+    True, in which case it counts the solutions (no further than "limit"
+    if a limit is given). Returns a tuple of the number of solutions
+    found, the first of them (None if there was none) and the frontier,
+    i.e. the list of paths of the subproblems that are still unexplored
+    once the budget has run out (empty if the subtree was finished).
+
+    This is search in Futoshiki.py itself, with the conflict-directed
+    backjumping and the nogoods, stopped by the board's node budget."""
+
+    a_board.nodes = 0
+    a_board.budget = budget
+    a_board.frontier = []
+    a_board.nogoods = {}
+    # The nogoods of the previous subproblem were proven with its path
+    # on the board, and don't necessarily hold below another one
+
+    found = 0
+    first = None
+    for solved in search(a_board):
+        found += 1
+        if first == None:
+            first = get_solution(a_board)
+        if not enumerate_all or found == limit:
+            return (found, first, [])
+            # The board doesn't need restoring, since the next
+            # subproblem starts by undoing everything above the base
+
+    return (found, first, [path + rest for rest in a_board.frontier])
+
+
+def run_subproblem(task: tuple) -> tuple:
+    """ Runs in the worker processes. "task" is a tuple of the path of
+    the subproblem, the node budget, whether to enumerate, the limit and
+    whether to measure the work done. The result is the tuple returned
+    by explore, followed by a SearchStats object for the subproblem if
+    it was measured and None otherwise."""
+
+    path, budget, enumerate_all, limit, measure = task
+    stats = SearchStats() if measure else None
+    _board.stats = stats
+    _board.undo(_base)
+    if apply_path(_board, path):
+        return (0, None, [], stats)
+    result = explore(_board, path, budget, enumerate_all, limit)
+    if stats != None:
+        stats.nodes += _board.nodes
+        stats.max_depth += len(path)
+        # The levels of the search start below the path
+    return result + (stats,)
+
+
+def split(a_board, count: int) -> tuple:
+    """ Expands the search tree of the given (propagated) board breadth-
+    first until there are at least "count" subproblems or none are left.
+    Returns a tuple of the list of their paths and the list of solutions
+    met on the way, for small puzzles that are solved while splitting."""
+
+    base = len(a_board.trail)
+    paths = [[]]
+    solutions = []
+    while paths and len(paths) < count:
+        path = paths.pop(0)
+        a_board.undo(base)
+        apply_path(a_board, path)
+        selected = select_unassigned_cell(a_board)
+        mark = len(a_board.trail)
+        for value in order_domain_values(selected, a_board):
+            if is_consistent(a_board, selected, value):
+                a_board.set_assign(selected, value)
+                if not start_fc(a_board, selected):
+                    if is_complete(a_board):
+                        solutions.append(get_solution(a_board))
+                    else:
+                        paths.append(path + [(selected.index, value)])
+            a_board.undo(mark)
+
+    a_board.undo(base)
+    return (paths, solutions)
+
+
+def run_parallel(initial_state: list, constr: list, enumerate_all: bool,
+        limit: int, jobs: int, budget: int, heuristic: int,
+        value_order: int, timeout: float = None,
+        stats: SearchStats = None) -> tuple:
+    """ The common part of parallel_solve and parallel_count. Returns a
+    tuple of the number of solutions found (all of them, or as many as
+    the limit, when enumerating) and the first solution found. Raises a
+    TimeoutError once "timeout" seconds have passed without an answer,
+    and a RuntimeError if a worker process dies, since the subproblem
+    it was searching would never report back. If a SearchStats object
+    is given, the work done while splitting and in every subproblem
+    that reports back is added to it; the subproblems cancelled once
+    the answer is known aren't counted."""
+
+    a_board = prepare_board(initial_state, constr, heuristic, value_order)
+    a_board.stats = stats
+    if start_fc(a_board):
+        return (0, None)
+    paths, solutions = split(a_board, jobs * 4)
+    # A few subproblems per worker to begin with; the rest of the load
+    # balancing comes from the workers handing back their frontiers
+
+    found = len(solutions)
+    first = solutions[0] if solutions else None
+    if (first != None and not enumerate_all) or (
+            limit != None and found >= limit):
+        return (min(found, limit) if limit != None else found, first)
+    if not paths:
+        return (found, first)
+
+    results = queue.Queue()
+    # Filled by the result handler thread of the pool as subproblems
+    # finish, in whatever order they do
+    deadline = None
+    if timeout != None:
+        deadline = time.monotonic() + timeout
+    before = set(process.pid for process in active_children())
+    # Other child processes of the caller, which have nothing to do
+    # with the pool and may come and go while it runs
+    with Pool(jobs, init_worker, (initial_state, constr, heuristic,
+            value_order)) as pool:
+        workers = set(process.pid for process in active_children()) - before
+        # The pool replaces a worker that dies with a new process, but
+        # the subproblem it was given is lost
+        pending = 0
+        for path in paths:
+            pool.apply_async(run_subproblem, ((path, budget, enumerate_all,
+                limit, stats != None),), callback=results.put,
+                error_callback=results.put)
+            pending += 1
+
+        while pending:
+            try:
+                result = results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if deadline != None and time.monotonic() >= deadline:
+                    raise TimeoutError("no answer within " + str(timeout)
+                            + " seconds")
+                if not workers <= set(process.pid
+                        for process in active_children()):
+                    raise RuntimeError("a worker process died while "
+                            "searching a subproblem")
+                continue
+            pending -= 1
+            if isinstance(result, BaseException):
+                raise result
+            count, solution, rest, worker_stats = result
+            if stats != None:
+                stats.add(worker_stats)
+            found += count
+            if first == None:
+                first = solution
+            if (first != None and not enumerate_all) or (
+                    limit != None and found >= limit):
+                break
+                # Leaving the "with" block terminates the pool, which
+                # cancels every subproblem that's still running
+
+            for path in rest:
+                pool.apply_async(run_subproblem, ((path, budget,
+                    enumerate_all, limit, stats != None),),
+                    callback=results.put, error_callback=results.put)
+                pending += 1
+
+    if limit != None:
+        found = min(found, limit)
+    return (found, first)
+
+
+def parallel_solve(puzzle, constr: list = None, jobs: int = None,
+        budget: int = BUDGET, heuristic: int = MRV,
+        value_order: int = ASCENDING, timeout: float = None,
+        stats: SearchStats = None) -> list:
+    """ The parallel counterpart of solve in Futoshiki.py. The puzzle is
+    given as described in prepare_board. Returns the solution as a
+    size-by-size list of integers, or None if the puzzle has no
+    solution. Raises a TimeoutError if there's no answer within
+    "timeout" seconds (see run_parallel). With a single job, this is
+    just solve, without a time limit. If a SearchStats object is given,
+    the work of the workers is added to it as in run_parallel, their
+    times adding up while "seconds" is the wall time."""
+
+    if jobs == None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1:
+        return solve(puzzle, constr, heuristic, value_order, stats)
+    start = time.perf_counter()
+    [initial_state, constr] = normalize_puzzle(puzzle, constr)
+    solution = run_parallel(initial_state, constr, False, None, jobs,
+            budget, heuristic, value_order, timeout, stats)[1]
+    if stats != None:
+        if solution != None:
+            stats.solutions += 1
+        stats.seconds += time.perf_counter() - start
+    return solution
+
+
+def parallel_count(puzzle, constr: list = None, limit: int = None,
+        jobs: int = None, budget: int = BUDGET, heuristic: int = MRV,
+        value_order: int = ASCENDING, timeout: float = None,
+        stats: SearchStats = None) -> int:
+    """ The parallel counterpart of count_solutions in Futoshiki.py,
+    which adds up the solutions of all subproblems. The timeout and the
+    SearchStats object are as in parallel_solve."""
+
+    if jobs == None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1:
+        return count_solutions(puzzle, constr, limit, heuristic,
+                value_order, stats)
+    if limit != None and limit <= 0:
+        return 0
+    start = time.perf_counter()
+    [initial_state, constr] = normalize_puzzle(puzzle, constr)
+    count = run_parallel(initial_state, constr, True, limit, jobs, budget,
+            heuristic, value_order, timeout, stats)[0]
+    if stats != None:
+        stats.solutions += count
+        stats.seconds += time.perf_counter() - start
+    return count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+            description="Solve one Futoshiki puzzle on many cores.")
+    parser.add_argument("input", help="the input file of the puzzle")
+    parser.add_argument("-o", "--output", default=None,
+            help="write the solution to this file (default: print it)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+            help="number of worker processes (default: all cores)")
+    parser.add_argument("--count", action="store_true",
+            help="count the solutions instead of finding one")
+    parser.add_argument("--limit", type=int, default=None,
+            help="count no further than this many solutions")
+    parser.add_argument("--budget", type=int, default=BUDGET,
+            help="assignments per subproblem before it's split again")
+    parser.add_argument("--timeout", type=float, default=None,
+            help="give up after this many seconds (default: no limit)")
+    args = parser.parse_args()
+
+    [initial_state, constr] = load_input(args.input)
+    try:
+        if args.count:
+            print(parallel_count(initial_state, constr, args.limit,
+                args.jobs, args.budget, timeout=args.timeout))
+            return 0
+        solution = parallel_solve(initial_state, constr, args.jobs,
+                args.budget, timeout=args.timeout)
+    except (TimeoutError, RuntimeError) as error:
+        print(type(error).__name__ + ": " + str(error))
+        return 1
+
+    if solution == None:
+        print("There's no solution to this puzzle.")
+        return 1
+    lines = [' '.join(map(str, a_row)) for a_row in solution]
+    if args.output != None:
+        with open(args.output, 'w') as out_file:
+            for line in lines:
+                out_file.write(line + '\n')
+    else:
+        for line in lines:
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+""" Races several differently configured solvers on the same puzzle, each
+in a process of its own, and returns the first answer, cancelling the
+rest. How long the search takes on a puzzle can vary by orders of
+magnitude with the order in which cells and values are tried, and which
+order suits a puzzle best can't be told in advance; racing a few of
+them makes the time taken by the worst puzzles far more predictable.
+
+A configuration combines:
+
+- the heuristic for choosing cells (MRV or DOM_WDEG) and the order of
+  values (ASCENDING or LEAST_CONSTRAINING), see Futoshiki.py,
+- the level of propagation of the rows and columns: ALL_DIFFERENT
+  (full propagation, with Regin's all-different filtering after the
+  arcs) or PAIRWISE (the arcs alone, i.e. plain "not equal"
+  constraints), which does more search per second on puzzles where the
+  stronger filtering rarely prunes anything,
+- the backend, either the backtracking search ("search") or the SAT
+  solver of sat_solve.py ("sat"), which propagates by unit propagation
+  on its clauses and learns new clauses from its conflicts instead of
+  backtracking chronologically; it ignores the level of propagation,
+- and a seed, which picks one of the 16 symmetries of the puzzle (the 8
+  rotations and reflections of the board, each with or without
+  reversing the values 1..N, which turns every "<" into ">"). The
+  solver searches the transformed puzzle, whose search tree is shaped
+  differently, and its solution is transformed back.
+
+Usage:
+    python portfolio_solve.py INPUT [-o OUTPUT] [-j JOBS]"""
+
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from Futoshiki import (NO_CONSTR, SMALLER, GREATER, UP, DOWN, LEFT, RIGHT,
+        MRV, DOM_WDEG, ASCENDING, LEAST_CONSTRAINING, ALL_DIFFERENT,
+        PAIRWISE, SearchStats, load_input, normalize_puzzle, solve)
+
+
+CONFIGS = [
+    ("mrv", MRV, ASCENDING, ALL_DIFFERENT, "search", 0),
+    ("dom/wdeg", DOM_WDEG, ASCENDING, ALL_DIFFERENT, "search", 0),
+    ("mrv-lcv", MRV, LEAST_CONSTRAINING, ALL_DIFFERENT, "search", 0),
+    ("sat", MRV, ASCENDING, ALL_DIFFERENT, "sat", 0),
+    ("mrv-pairwise", MRV, ASCENDING, PAIRWISE, "search", 0),
+    ("dom/wdeg-lcv-5", DOM_WDEG, LEAST_CONSTRAINING, ALL_DIFFERENT,
+        "search", 5),
+    ("mrv-10", MRV, ASCENDING, ALL_DIFFERENT, "search", 10),
+    ("dom/wdeg-pairwise-3", DOM_WDEG, ASCENDING, PAIRWISE, "search", 3),
+]
+# The default portfolio, in the order in which the configurations are
+# started: each is a tuple of a name, the heuristic, the order of
+# values, the level of propagation, the backend and the seed
+
+
+OFFSETS = {UP: (-1, 0), DOWN: (1, 0), LEFT: (0, -1), RIGHT: (0, 1)}
+
+
+def transform_cell(size: int, row: int, col: int, seed: int) -> tuple:
+    """ Returns the coordinates that the cell (row, col) moves to under
+    the symmetry picked by the seed: bit 0 of the seed transposes the
+    board, bits 1 and 2 mirror the rows and the columns, and bit 3
+    reverses the values (which leaves the coordinates alone)."""
+
+    if seed & 1:
+        row, col = col, row
+    if seed & 2:
+        row = size - 1 - row
+    if seed & 4:
+        col = size - 1 - col
+    return (row, col)
+
+
+def transform_puzzle(initial_state: list, constr: list, seed: int) -> list:
+    """ Returns the puzzle transformed by the symmetry picked by the seed
+    as a list [initial_state, constr], in the format of load_input."""
+
+    size = len(initial_state)
+    seed %= 16
+    new_state = [[0] * size for i in range(0, size)]
+    new_constr = [[[NO_CONSTR, NO_CONSTR, NO_CONSTR, NO_CONSTR]
+        for j in range(0, size)] for i in range(0, size)]
+
+    for i in range(0, size):
+        for j in range(0, size):
+            row, col = transform_cell(size, i, j, seed)
+            value = initial_state[i][j]
+            if value != 0 and seed & 8:
+                value = size + 1 - value
+            new_state[row][col] = value
+
+            for direction in (UP, DOWN, LEFT, RIGHT):
+                relation = constr[i][j][direction]
+                if relation == NO_CONSTR:
+                    continue
+                if seed & 8:
+                    relation = SMALLER + GREATER - relation
+                offset = OFFSETS[direction]
+                neighbor = transform_cell(size, i + offset[0],
+                        j + offset[1], seed)
+                for new_direction in (UP, DOWN, LEFT, RIGHT):
+                    if OFFSETS[new_direction] == (neighbor[0] - row,
+                            neighbor[1] - col):
+                        new_constr[row][col][new_direction] = relation
+
+    return [new_state, new_constr]
+
+
+def restore_solution(solution: list, seed: int) -> list:
+    """ Transforms a solution of the transformed puzzle back into one of
+    the original puzzle."""
+
+    size = len(solution)
+    seed %= 16
+    restored = [[0] * size for i in range(0, size)]
+    for i in range(0, size):
+        for j in range(0, size):
+            row, col = transform_cell(size, i, j, seed)
+            value = solution[row][col]
+            if seed & 8:
+                value = size + 1 - value
+            restored[i][j] = value
+    return restored
+
+
+def run_config(job: tuple) -> tuple:
+    """ Runs in the worker processes. "job" is a tuple of the initial
+    state, the constraints, a configuration from CONFIGS and whether to
+    measure the work done. Returns a tuple of the name of the
+    configuration, the solution of the original puzzle (None if it has
+    none), the time taken and a SearchStats object if the work was
+    measured (None otherwise)."""
+
+    initial_state, constr, config, measure = job
+    name, heuristic, value_order, propagation, backend, seed = config
+    stats = SearchStats() if measure else None
+    start = time.perf_counter()
+    [new_state, new_constr] = transform_puzzle(initial_state, constr, seed)
+    if backend == "sat":
+        from sat_solve import solve_sat
+        solution = solve_sat(new_state, new_constr, stats)
+    else:
+        solution = solve(new_state, new_constr, heuristic, value_order,
+                stats, propagation=propagation)
+    if solution != None:
+        solution = restore_solution(solution, seed)
+    return (name, solution, time.perf_counter() - start, stats)
+
+
+def portfolio_solve(puzzle, constr: list = None, configs: list = None,
+        jobs: int = None, stats: SearchStats = None) -> tuple:
+    """ Races the configurations (CONFIGS by default) on the puzzle,
+    given as described in prepare_board, with up to "jobs" of them
+    running at a time (one per core by default). Every configuration is
+    a complete solver, so the first one to finish decides the puzzle.
+    Returns a tuple of the solution (None if the puzzle has no
+    solution), the name of the winning configuration and its time. If
+    a SearchStats object is given, the work done by the winning
+    configuration is added to it; the others are cancelled unmeasured."""
+
+    if configs == None:
+        configs = CONFIGS
+    if jobs == None:
+        jobs = os.cpu_count() or 1
+    [initial_state, constr] = normalize_puzzle(puzzle, constr)
+    jobs = max(1, min(jobs, len(configs)))
+
+    tasks = [(initial_state, constr, config, stats != None)
+            for config in configs]
+    with Pool(jobs) as pool:
+        for name, solution, seconds, winner_stats in pool.imap_unordered(
+                run_config, tasks):
+            if stats != None:
+                stats.add(winner_stats)
+            return (solution, name, seconds)
+            # Leaving the "with" block terminates the pool, which kills
+            # the configurations that are still running
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+            description="Race several solver configurations on a puzzle.")
+    parser.add_argument("input", help="the input file of the puzzle")
+    parser.add_argument("-o", "--output", default=None,
+            help="write the solution to this file (default: print it)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+            help="configurations run at a time (default: all cores)")
+    args = parser.parse_args()
+
+    [initial_state, constr] = load_input(args.input)
+    solution, name, seconds = portfolio_solve(initial_state, constr,
+            jobs=args.jobs)
+    print("Answered by %s in %.6f s" % (name, seconds))
+    if solution == None:
+        print("There's no solution to this puzzle.")
+        return 1
+    lines = [' '.join(map(str, a_row)) for a_row in solution]
+    if args.output != None:
+        with open(args.output, 'w') as out_file:
+            for line in lines:
+                out_file.write(line + '\n')
+    else:
+        for line in lines:
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
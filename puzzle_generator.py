@@ -0,0 +1,273 @@
+""" Generates random size-by-size Futoshiki puzzles whose solutions are
+guaranteed to be unique, in the format of the input files. A puzzle is
+made in three steps:
+
+1. A random Latin square is built by a randomized backtracking search
+   over an empty board; this becomes the solution of the puzzle.
+2. Inequality signs consistent with that solution are placed between a
+   random share of the pairs of adjacent cells.
+3. Starting from a puzzle in which every cell is given, the givens are
+   removed one by one in random order, and a removal is kept only if
+   the solution stays unique.
+
+All searching is done with the Board objects and the propagation of
+Futoshiki.py, so the generated puzzles are exactly as hard for the
+solver as they look.
+
+Usage:
+    python puzzle_generator.py SIZE [-n COUNT] [--seed SEED]
+            [--signs SHARE] [-o FILE | -d DIRECTORY] [-j JOBS]
+
+The puzzles are printed, or written into a single multi-puzzle FILE
+with a "# name" header before each puzzle, or into DIRECTORY as
+Input1.txt, Input2.txt and so on."""
+
+import argparse
+import os
+import random
+import sys
+from multiprocessing import Pool
+
+from Futoshiki import (NO_CONSTR, SMALLER, GREATER, UP, DOWN, LEFT, RIGHT,
+        initialize_board, start_fc, select_unassigned_cell, is_complete,
+        domain_values, backtrack, get_solution, format_input)
+
+
+def random_latin_square(size: int, rng: random.Random) -> list:
+    """ Returns a random size-by-size Latin square as a list of rows."""
+
+    empty = [[0] * size for i in range(0, size)]
+    a_board = initialize_board(empty, no_constraints(size))
+    start_fc(a_board)
+    fill_randomly(a_board, rng)
+    return get_solution(a_board)
+
+
+def fill_randomly(a_board, rng: random.Random) -> bool:
+    """ The same backtracking as in Futoshiki.py, only that the values of
+    each cell are tried in a random order. Returns True once the board is
+    complete, leaving the assignment on the board."""
+
+    if is_complete(a_board):
+        return True
+
+    selected = select_unassigned_cell(a_board)
+    mark = len(a_board.trail)
+    values = domain_values(selected.domain)
+    rng.shuffle(values)
+    for value in values:
+        a_board.set_assign(selected, value)
+        if not start_fc(a_board, selected) and fill_randomly(a_board, rng):
+            return True
+        a_board.undo(mark)
+
+    return False
+
+
+def no_constraints(size: int) -> list:
+    """ Returns the list of constraints of a board without any signs."""
+    return [[[NO_CONSTR, NO_CONSTR, NO_CONSTR, NO_CONSTR]
+        for j in range(0, size)] for i in range(0, size)]
+
+
+def add_signs(solution: list, share: float, rng: random.Random) -> list:
+    """ Returns the list of constraints in which roughly "share" of all
+    pairs of adjacent cells carry the sign that holds in the solution."""
+
+    size = len(solution)
+    constr = no_constraints(size)
+    for i in range(0, size):
+        for j in range(0, size):
+            if j < size - 1 and rng.random() < share:
+                # A sign between the cell and its right neighbor
+                if solution[i][j] < solution[i][j+1]:
+                    constr[i][j][RIGHT] = SMALLER
+                    constr[i][j+1][LEFT] = GREATER
+                else:
+                    constr[i][j][RIGHT] = GREATER
+                    constr[i][j+1][LEFT] = SMALLER
+
+            if i < size - 1 and rng.random() < share:
+                # A sign between the cell and the one below it
+                if solution[i][j] < solution[i+1][j]:
+                    constr[i][j][DOWN] = SMALLER
+                    constr[i+1][j][UP] = GREATER
+                else:
+                    constr[i][j][DOWN] = GREATER
+                    constr[i+1][j][UP] = SMALLER
+
+    return constr
+
+
+def has_other_solution(a_board, row: int, col: int, value: int) -> bool:
+    """ Works with generate_puzzle. The board holds every given of the
+    puzzle but the cell (row, col), which is unassigned, and has been
+    propagated; with that cell given as "value", the puzzle is known to
+    have a unique solution. So any other solution must put a different
+    value into that cell, and instead of counting solutions up to two,
+    it's enough to look for a single solution with "value" removed from
+    the cell's domain, which most of the time fails during propagation
+    without any search at all. The board is restored before returning."""
+
+    a_cell = a_board.cells[row][col]
+    domain = a_cell.domain & ~(1 << value)
+    if domain == 0:
+        return False
+        # The other givens already leave no other value for the cell
+
+    mark = len(a_board.trail)
+    a_board.set_domain(a_cell, domain)
+    if start_fc(a_board, a_cell):
+        found = False
+    else:
+        a_board.nogoods = {}
+        # The nogoods of an earlier search were proven with more givens
+        # on the board, and don't necessarily hold without them
+        found = backtrack(a_board)
+    a_board.undo(mark)
+    return found
+
+
+def assign_givens(a_board, givens: list) -> None:
+    """ Works with generate_puzzle. Assigns the (row, col, value) givens
+    and propagates them all at once, starting from the assigned cells
+    alone since the rest of the board has been propagated before. The
+    propagation can't fail, since the givens are all part of one
+    solution."""
+
+    cells = []
+    for row, col, value in givens:
+        a_cell = a_board.cells[row][col]
+        a_board.set_assign(a_cell, value)
+        cells.append(a_cell)
+    if cells:
+        start_fc(a_board, cells=cells)
+
+
+def remove_givens(a_board, givens: list, initial_state: list) -> None:
+    """ Works with generate_puzzle. Tests the removal of each of the
+    (row, col, value) givens in turn, setting the cell to 0 in
+    initial_state when the solution stays unique without it. The board
+    holds every other given of initial_state, and is restored before
+    returning.
+
+    Testing a removal needs every other given on the board, and those
+    change as the removals are decided, so the board can't simply be
+    rebuilt for each of them without propagating all givens over and
+    over. Instead, the givens are split in two halves: the second half
+    is assigned while the removals of the first one are tested, and
+    popped off the trail again; then the givens of the first half that
+    had to stay are assigned while the second half is tested. Every
+    given is assigned about log2(len(givens)) times in all."""
+
+    if len(givens) == 1:
+        row, col, value = givens[0]
+        if not has_other_solution(a_board, row, col, value):
+            initial_state[row][col] = 0
+        # Otherwise the given is needed to keep the solution unique
+        return
+
+    half = len(givens) // 2
+    mark = len(a_board.trail)
+    assign_givens(a_board, givens[half:])
+    remove_givens(a_board, givens[:half], initial_state)
+    a_board.undo(mark)
+
+    assign_givens(a_board, [(row, col, value)
+        for row, col, value in givens[:half] if initial_state[row][col]])
+    remove_givens(a_board, givens[half:], initial_state)
+    a_board.undo(mark)
+
+
+def generate_puzzle(size: int, rng: random.Random = None,
+        share: float = 0.3) -> list:
+    """ Returns a random puzzle with a unique solution as a list
+    [initial_state, constr], in the format returned by load_input.
+    "share" is the share of adjacent pairs that get an inequality sign.
+    The removals are all tested on a single board (see remove_givens)."""
+
+    if rng == None:
+        rng = random.Random()
+
+    solution = random_latin_square(size, rng)
+    constr = add_signs(solution, share, rng)
+    initial_state = [a_row[:] for a_row in solution]
+    # Every cell starts out given, which makes the solution unique
+
+    cells = [(i, j) for i in range(0, size) for j in range(0, size)]
+    rng.shuffle(cells)
+    empty = [[0] * size for i in range(0, size)]
+    a_board = initialize_board(empty, constr)
+    start_fc(a_board)
+    remove_givens(a_board, [(row, col, solution[row][col])
+        for row, col in cells], initial_state)
+
+    return [initial_state, constr]
+
+
+def generate_numbered(job: tuple) -> str:
+    """ Runs in the worker processes of main. "job" is a tuple of the
+    size, the share of signs, the base seed and the number of the
+    puzzle; the seed of each puzzle is derived from the base seed and
+    its number, so the same command always produces the same puzzles.
+    Returns the puzzle in the format of the input files."""
+
+    size, share, seed, number = job
+    rng = random.Random(str(seed) + "-" + str(number))
+    [initial_state, constr] = generate_puzzle(size, rng, share)
+    return format_input(initial_state, constr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+            description="Generate Futoshiki puzzles with unique solutions.")
+    parser.add_argument("size", type=int, help="the size of the board")
+    parser.add_argument("-n", "--count", type=int, default=1,
+            help="the number of puzzles to generate")
+    parser.add_argument("--seed", default=None,
+            help="the base seed (default: a random one)")
+    parser.add_argument("--signs", type=float, default=0.3,
+            help="the share of adjacent pairs with a sign (default: 0.3)")
+    parser.add_argument("-o", "--output", default=None,
+            help="write all puzzles into this multi-puzzle file")
+    parser.add_argument("-d", "--directory", default=None,
+            help="write each puzzle into this directory as InputN.txt")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+            help="number of worker processes (default: 1)")
+    args = parser.parse_args()
+
+    seed = args.seed
+    if seed == None:
+        seed = random.randrange(1 << 32)
+    jobs = [(args.size, args.signs, seed, number)
+            for number in range(1, args.count + 1)]
+
+    if args.jobs > 1:
+        with Pool(args.jobs) as pool:
+            puzzles = pool.map(generate_numbered, jobs,
+                    max(1, args.count // (args.jobs * 4)))
+    else:
+        puzzles = list(map(generate_numbered, jobs))
+
+    if args.directory != None:
+        os.makedirs(args.directory, exist_ok=True)
+        for number in range(1, len(puzzles) + 1):
+            filename = os.path.join(args.directory,
+                    "Input" + str(number) + ".txt")
+            with open(filename, 'w') as out_file:
+                out_file.write(puzzles[number - 1])
+        return 0
+
+    out_file = sys.stdout
+    if args.output != None:
+        out_file = open(args.output, 'w')
+    for number in range(1, len(puzzles) + 1):
+        out_file.write("# seed " + str(seed) + " puzzle " + str(number)
+                + '\n' + puzzles[number - 1] + '\n')
+    if args.output != None:
+        out_file.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
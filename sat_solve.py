@@ -0,0 +1,518 @@
+""" An alternative solving backend that encodes a puzzle as a boolean
+formula in conjunctive normal form (CNF) and solves it with a conflict-
+driven clause-learning (CDCL) SAT solver written in pure Python. Where
+the backtracking search of Futoshiki.py only ever undoes its most recent
+decision, the SAT solver learns a new clause from every dead end and
+jumps straight back to the decision that caused it, which keeps it from
+thrashing on the hardest large grids.
+
+The encoding has one boolean variable per cell and value, numbered
+index * size + value, where index is the flat index of the cell (row *
+size + column) and the value ranges from 1 to size, i.e. the variables
+are numbered from 1 to size ** 3 as DIMACS requires. The clauses say:
+
+- every cell takes exactly one of the values left in its domain,
+- every row and every column holds each value exactly once,
+- and, for a cell that must be smaller than its neighbor, that the cell
+  taking the value v implies the neighbor taking one greater than v
+  (and the other way round for "greater").
+
+Usage:
+    python sat_solve.py INPUT [-o OUTPUT] [--dimacs FILE]
+
+Solves the puzzle in INPUT and prints the solution (or writes it to
+OUTPUT in the format of the output files). With --dimacs, the formula is
+written to FILE in the DIMACS CNF format instead, so that it can be
+handed to any other SAT solver."""
+
+import argparse
+import heapq
+import sys
+import time
+
+from Futoshiki import (SMALLER, Board, SearchStats, prepare_board,
+        start_fc, domain_values, load_input)
+
+
+def encode_board(a_board: Board) -> tuple:
+    """ Encodes the given board in its current state (the domains left
+    after propagation keep the formula small) and returns a tuple of the
+    number of variables and the list of clauses, each a list of nonzero
+    integers in the DIMACS convention: v stands for the variable v being
+    true and -v for it being false."""
+
+    size = a_board.size
+    cells = a_board.flat
+    clauses = []
+
+    for a_cell in cells:
+        base = a_cell.index * size
+        values = domain_values(a_cell.domain)
+        clauses.append([base + value for value in values])
+        # The cell takes at least one of the values in its domain
+        for value in range(1, size + 1):
+            if not a_cell.domain >> value & 1:
+                clauses.append([-(base + value)])
+        add_at_most_one(clauses, [base + value for value in values])
+
+    for line in a_board.topology.lines:
+        for value in range(1, size + 1):
+            holders = [index * size + value for index in line
+                    if cells[index].domain >> value & 1]
+            clauses.append(holders)
+            # An empty clause if no cell of the line can take the
+            # value, which makes the formula unsatisfiable as it should
+            add_at_most_one(clauses, holders)
+
+    for a_cell in cells:
+        base = a_cell.index * size
+        for neighbor, relation in a_board.arcs[a_cell.index]:
+            other = cells[neighbor]
+            for value in domain_values(a_cell.domain):
+                if relation == SMALLER:
+                    allowed = range(value + 1, size + 1)
+                else:
+                    allowed = range(1, value)
+                clauses.append([-(base + value)] + [neighbor * size + w
+                    for w in allowed if other.domain >> w & 1])
+                # Both cells of an arc get these clauses, so that the
+                # solver can propagate in either direction
+
+    return (size ** 3, clauses)
+
+
+def add_at_most_one(clauses: list, variables: list) -> None:
+    """ Appends the clauses saying that at most one of the variables is
+    true: one binary clause for every pair of them."""
+    for i in range(len(variables)):
+        for j in range(i + 1, len(variables)):
+            clauses.append([-variables[i], -variables[j]])
+
+
+def write_dimacs(num_vars: int, clauses: list, filename: str,
+        comment: str = None) -> int:
+    """ Writes the formula to the given file in the DIMACS CNF format."""
+
+    with open(filename, 'w') as out_file:
+        if comment != None:
+            for line in comment.splitlines():
+                out_file.write("c " + line + '\n')
+        out_file.write("p cnf " + str(num_vars) + " " + str(len(clauses))
+                + '\n')
+        for clause in clauses:
+            out_file.write(' '.join(map(str, clause)) + " 0\n")
+
+    return 0
+
+
+def luby(i: int) -> int:
+    """ Returns the i-th element (counting from 0) of the Luby sequence
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ... that scales the
+    intervals between restarts."""
+
+    size = 1
+    sequence = 0
+    while size < i + 1:
+        sequence += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        sequence -= 1
+        i = i % size
+    return 1 << sequence
+
+
+class CDCLSolver:
+    """ A conflict-driven clause-learning SAT solver. Each clause is
+    watched by two of its literals, so that assigning a variable only
+    visits the clauses that may have become unit; every conflict is
+    analyzed down to its first unique implication point, and the learnt
+    clause decides how far to jump back. The next variable to branch on
+    is the one most involved in recent conflicts (VSIDS), taking the
+    value it had last (phase saving), and the search restarts after a
+    number of conflicts that follows the Luby sequence.
+
+    Inside the solver, the literals are numbered 2 * v for the variable
+    v being true and 2 * v + 1 for it being false, so that "^ 1" negates
+    a literal and ">> 1" gives its variable."""
+
+    RESTART_BASE = 100
+    # The number of conflicts in the first restart interval
+
+    DECAY = 0.95
+    # The factor by which the activities of all variables fade after
+    # each conflict (by raising the increment instead)
+
+    def __init__(self, num_vars: int, clauses: list):
+        self.num_vars = num_vars
+        self.value = [0] * (2 * num_vars + 2)
+        # 1 if the literal is true, -1 if it's false and 0 if its
+        # variable is unassigned
+        self.level = [0] * (num_vars + 1)
+        self.reason = [None] * (num_vars + 1)
+        # The clause that implied each assigned variable (None for a
+        # decision or a fact)
+        self.phase = [1] * (num_vars + 1)
+        # The last value taken by each variable as the lowest bit of a
+        # literal, starting out false: most cell-value pairs are false
+        self.activity = [0.0] * (num_vars + 1)
+        self.increment = 1.0
+        self.heap = [(0.0, var) for var in range(1, num_vars + 1)]
+        # The candidates for branching as (-activity, variable) pairs;
+        # stale pairs are skipped when popped
+
+        self.watchers = [[] for lit in range(2 * num_vars + 2)]
+        # The clauses watched by each literal, visited when it turns false
+        self.trail = []
+        # The true literals in the order in which they were assigned
+        self.limits = []
+        # The length of the trail at each decision
+        self.head = 0
+        # The position in the trail up to which propagate has been run
+        self.learnts = []
+        # (number of levels, clause) for every learnt clause
+        self.max_learnts = max(2000, len(clauses) // 3)
+        self.decisions = 0
+        self.conflicts = 0
+        self.unsatisfiable = False
+
+        for clause in clauses:
+            lits = list(set(2 * lit if lit > 0 else -2 * lit + 1
+                for lit in clause))
+            if not self.add_clause(lits):
+                self.unsatisfiable = True
+                break
+
+
+    def add_clause(self, lits: list) -> bool:
+        """ Adds a clause of the original formula at level 0. Returns
+        False if it makes the formula trivially unsatisfiable."""
+
+        if not lits:
+            return False
+        if len(lits) == 1:
+            if self.value[lits[0]] == -1:
+                return False
+            if self.value[lits[0]] == 0:
+                self.assign(lits[0], None)
+            return True
+        self.watchers[lits[0]].append(lits)
+        self.watchers[lits[1]].append(lits)
+        return True
+
+
+    def assign(self, lit: int, reason: list) -> None:
+        value = self.value
+        value[lit] = 1
+        value[lit ^ 1] = -1
+        var = lit >> 1
+        self.level[var] = len(self.limits)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+
+    def propagate(self) -> list:
+        """ Runs unit propagation over the literals assigned since the
+        last call. Returns the clause that has all its literals false if
+        there's a conflict, and None otherwise. The first two literals of
+        every clause are the watched ones, and the implied literal of a
+        reason clause is always its first."""
+
+        value = self.value
+        watchers = self.watchers
+        trail = self.trail
+        while self.head < len(trail):
+            false_lit = trail[self.head] ^ 1
+            self.head += 1
+            watching = watchers[false_lit]
+            kept = []
+            watchers[false_lit] = kept
+            i = 0
+            while i < len(watching):
+                clause = watching[i]
+                i += 1
+                if not clause:
+                    continue
+                    # A learnt clause deleted by reduce_learnts
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if value[first] == 1:
+                    kept.append(clause)
+                    continue
+
+                for k in range(2, len(clause)):
+                    if value[clause[k]] != -1:
+                        # Another literal can take over the watch
+                        clause[1], clause[k] = clause[k], false_lit
+                        watchers[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if value[first] == -1:
+                        kept.extend(watching[i:])
+                        return clause
+                    self.assign(first, clause)
+                    # The clause has become unit
+
+        return None
+
+
+    def analyze(self, conflict: list) -> tuple:
+        """ Resolves the conflicting clause with the reasons of its
+        literals assigned at the current level until a single one of them
+        is left (the first unique implication point). Returns the learnt
+        clause, whose first literal is the negation of that one, and the
+        level to jump back to."""
+
+        seen = set()
+        learnt = [0]
+        current = len(self.limits)
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        start = 0
+        while True:
+            for lit in clause[start:]:
+                var = lit >> 1
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.level[var] == current:
+                        pending += 1
+                    else:
+                        learnt.append(lit)
+
+            while (self.trail[index] >> 1) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            var = lit >> 1
+            seen.discard(var)
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[var]
+            start = 1
+            # The first literal of a reason clause is the one it implied
+
+        learnt[0] = lit ^ 1
+        back_level = 0
+        if len(learnt) > 1:
+            best = 1
+            for k in range(2, len(learnt)):
+                if self.level[learnt[k] >> 1] > self.level[learnt[best] >> 1]:
+                    best = k
+            learnt[1], learnt[best] = learnt[best], learnt[1]
+            back_level = self.level[learnt[1] >> 1]
+            # The second literal is watched, so it must be the last one
+            # to be unassigned when jumping back
+
+        return (learnt, back_level)
+
+
+    def bump(self, var: int) -> None:
+        activity = self.activity
+        activity[var] += self.increment
+        if activity[var] > 1e100:
+            for other in range(1, self.num_vars + 1):
+                activity[other] *= 1e-100
+            self.increment *= 1e-100
+            self.heap = [(-activity[other], other)
+                    for other in range(1, self.num_vars + 1)
+                    if self.value[2 * other] == 0]
+            heapq.heapify(self.heap)
+        elif self.value[2 * var] == 0:
+            heapq.heappush(self.heap, (-activity[var], var))
+
+
+    def cancel_until(self, level: int) -> None:
+        """ Unassigns every variable assigned above the given level."""
+
+        if len(self.limits) <= level:
+            return
+        value = self.value
+        for lit in self.trail[self.limits[level]:]:
+            var = lit >> 1
+            self.phase[var] = lit & 1
+            value[lit] = 0
+            value[lit ^ 1] = 0
+            self.reason[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[self.limits[level]:]
+        del self.limits[level:]
+        self.head = len(self.trail)
+
+
+    def pick_branch(self) -> int:
+        """ Returns the unassigned variable with the highest activity, or
+        0 if every variable has been assigned."""
+
+        heap = self.heap
+        while heap:
+            negative, var = heapq.heappop(heap)
+            if self.value[2 * var] == 0 and -negative == self.activity[var]:
+                return var
+        return 0
+
+
+    def reduce_learnts(self) -> None:
+        """ Deletes the learnt clauses that spread over the most levels,
+        keeping the better half as well as the clauses that are currently
+        the reason of an assignment. Deleted clauses are emptied in place
+        and dropped from the watch lists by propagate."""
+
+        self.learnts.sort(key=lambda pair: pair[0])
+        kept = self.learnts[:len(self.learnts) // 2]
+        for levels, clause in self.learnts[len(self.learnts) // 2:]:
+            var = clause[0] >> 1
+            if levels <= 2 or (self.reason[var] is clause and
+                    self.value[clause[0]] == 1):
+                kept.append((levels, clause))
+            else:
+                clause.clear()
+        self.learnts = kept
+        self.max_learnts += self.max_learnts // 10
+
+
+    def solve(self, max_conflicts: int = None) -> bool:
+        """ Runs the search. Returns True if the formula is satisfiable
+        (see model), False if it isn't, and None if "max_conflicts" was
+        given and that many conflicts occurred first."""
+
+        if self.unsatisfiable or self.propagate() != None:
+            return False
+
+        restarts = 0
+        budget = luby(0) * self.RESTART_BASE
+        while True:
+            conflict = self.propagate()
+            if conflict != None:
+                self.conflicts += 1
+                if not self.limits:
+                    return False
+                    # A conflict without any decision to undo
+                learnt, back_level = self.analyze(conflict)
+                self.cancel_until(back_level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.watchers[learnt[0]].append(learnt)
+                    self.watchers[learnt[1]].append(learnt)
+                    levels = len(set(self.level[lit >> 1]
+                        for lit in learnt))
+                    self.learnts.append((levels, learnt))
+                    self.assign(learnt[0], learnt)
+                self.increment /= self.DECAY
+
+                if (max_conflicts != None and
+                        self.conflicts >= max_conflicts):
+                    return None
+                budget -= 1
+                if budget == 0:
+                    restarts += 1
+                    budget = luby(restarts) * self.RESTART_BASE
+                    self.cancel_until(0)
+                if len(self.learnts) >= self.max_learnts:
+                    self.reduce_learnts()
+                continue
+
+            var = self.pick_branch()
+            if var == 0:
+                return True
+                # Every variable has a value and no clause is violated
+            self.limits.append(len(self.trail))
+            self.decisions += 1
+            self.assign(2 * var + self.phase[var], None)
+
+
+    def model(self) -> list:
+        """ Returns the list of variables that are true in the
+        satisfying assignment found by solve."""
+        return [var for var in range(1, self.num_vars + 1)
+                if self.value[2 * var] == 1]
+
+
+def decode_model(a_board: Board, true_vars: list) -> list:
+    """ Turns the true variables of a model into the solution as a
+    size-by-size list of integers."""
+
+    size = a_board.size
+    solution = [[0] * size for i in range(0, size)]
+    for var in true_vars:
+        index, value = divmod(var - 1, size)
+        solution[index // size][index % size] = value + 1
+    return solution
+
+
+def solve_sat(puzzle, constr: list = None,
+        stats: SearchStats = None) -> list:
+    """ The counterpart of solve in Futoshiki.py that runs the SAT
+    backend instead of the backtracking search. The puzzle is given as
+    described in prepare_board. Returns the solution as a size-by-size
+    list of integers, or None if the puzzle has no solution. If a
+    SearchStats object is given, the initial propagation is counted as
+    in solve, the decisions of the SAT solver as nodes and its
+    conflicts as wipe-outs; the counters that only the backtracking
+    search has are left alone."""
+
+    if stats != None:
+        start = time.perf_counter()
+    a_board = prepare_board(puzzle, constr)
+    a_board.stats = stats
+    solution = None
+    solver = None
+    if not start_fc(a_board):
+        num_vars, clauses = encode_board(a_board)
+        solver = CDCLSolver(num_vars, clauses)
+        if solver.solve():
+            solution = decode_model(a_board, solver.model())
+
+    if stats != None:
+        if solver != None:
+            stats.nodes += solver.decisions
+            stats.wipeouts += solver.conflicts
+        if solution != None:
+            stats.solutions += 1
+        stats.seconds += time.perf_counter() - start
+    return solution
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+            description="Solve a Futoshiki puzzle with the SAT backend.")
+    parser.add_argument("input", help="the input file of the puzzle")
+    parser.add_argument("-o", "--output", default=None,
+            help="write the solution to this file (default: print it)")
+    parser.add_argument("--dimacs", default=None,
+            help="write the CNF formula to this file instead of solving")
+    args = parser.parse_args()
+
+    [initial_state, constr] = load_input(args.input)
+    if args.dimacs != None:
+        a_board = prepare_board(initial_state, constr)
+        num_vars, clauses = encode_board(a_board)
+        # Exported without propagation, so that the formula describes
+        # the puzzle exactly as given
+        write_dimacs(num_vars, clauses, args.dimacs, args.input +
+                "\nvariable (row * size + column) * size + value, size " +
+                str(a_board.size))
+        return 0
+
+    solution = solve_sat(initial_state, constr)
+    if solution == None:
+        print("There's no solution to this puzzle.")
+        return 1
+    lines = [' '.join(map(str, a_row)) for a_row in solution]
+    if args.output != None:
+        with open(args.output, 'w') as out_file:
+            for line in lines:
+                out_file.write(line + '\n')
+    else:
+        for line in lines:
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+""" A cache of solutions in front of the solver. Puzzles are looked up by
+a canonical form that is the same for all 16 symmetric variants of a
+puzzle (see portfolio_solve.py: the rotations and reflections of the
+board, each with or without the values mirrored v -> N + 1 - v, which
+flips every sign), so a transposed or mirrored repeat of a puzzle that
+has been solved before is answered by a dictionary lookup, with the
+cached solution mapped back through the symmetry.
+
+The most recently used solutions are kept in memory, up to a fixed
+number of them; optionally, every solution is also stored in an SQLite
+database on disk, which survives restarts and is consulted whenever a
+puzzle isn't in memory."""
+
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+
+from Futoshiki import (UP, DOWN, LEFT, RIGHT, SearchStats,
+        normalize_puzzle, solve)
+from portfolio_solve import OFFSETS, transform_cell, restore_solution
+
+
+_layouts = {}
+# The layouts computed so far (see get_layout), keyed by (size, seed)
+
+
+def get_layout(size: int, seed: int) -> tuple:
+    """ Describes the board as it looks after the rotation or reflection
+    picked by the lowest three bits of the seed, in terms of the
+    original board. Returns a tuple of two tuples: the flat index in the
+    original board of every cell of the transformed board, row by row,
+    and a (flat index, direction) pair for every pair of adjacent cells
+    of the transformed board (the horizontal pairs row by row, then the
+    vertical ones), naming the first cell of the pair in the original
+    board and the direction of the second cell as seen from it there."""
+
+    seed &= 7
+    if (size, seed) in _layouts:
+        return _layouts[(size, seed)]
+
+    original = [[0] * size for i in range(0, size)]
+    for i in range(0, size):
+        for j in range(0, size):
+            row, col = transform_cell(size, i, j, seed)
+            original[row][col] = (i, j)
+
+    def direction(first: tuple, second: tuple) -> int:
+        for a_direction in (UP, DOWN, LEFT, RIGHT):
+            if OFFSETS[a_direction] == (second[0] - first[0],
+                    second[1] - first[1]):
+                return a_direction
+
+    cells = tuple(original[row][col][0] * size + original[row][col][1]
+            for row in range(0, size) for col in range(0, size))
+    pairs = []
+    for row in range(0, size):
+        for col in range(0, size - 1):
+            first = original[row][col]
+            pairs.append((first[0] * size + first[1],
+                direction(first, original[row][col + 1])))
+    for row in range(0, size - 1):
+        for col in range(0, size):
+            first = original[row][col]
+            pairs.append((first[0] * size + first[1],
+                direction(first, original[row + 1][col])))
+
+    _layouts[(size, seed)] = (cells, tuple(pairs))
+    return _layouts[(size, seed)]
+
+
+def canonical_form(initial_state: list, constr: list) -> tuple:
+    """ Returns a tuple of the canonical key of the puzzle, a string that
+    is the same for every symmetric variant of it, and the seed of the
+    symmetry that turns the puzzle into its canonical variant. Among the
+    16 variants, the canonical one is the one whose values, followed by
+    its relations, come first in lexicographic order."""
+
+    size = len(initial_state)
+    values = [value for a_row in initial_state for value in a_row]
+    relations = [a_constr for a_row in constr for a_constr in a_row]
+
+    best = None
+    best_seed = 0
+    for seed in range(0, 16):
+        cells, pairs = get_layout(size, seed)
+        if seed & 8:
+            key = (tuple(size + 1 - values[index] if values[index] else 0
+                    for index in cells),
+                tuple(3 - relations[index][a_direction]
+                    if relations[index][a_direction] else 0
+                    for index, a_direction in pairs))
+            # 3 - relation swaps SMALLER (1) and GREATER (2)
+        else:
+            key = (tuple(values[index] for index in cells),
+                tuple(relations[index][a_direction]
+                    for index, a_direction in pairs))
+        if best == None or key < best:
+            best = key
+            best_seed = seed
+
+    text = str(size) + ":" + ",".join(map(str, best[0])) + ":" + \
+            "".join(map(str, best[1]))
+    return (hashlib.sha256(text.encode()).hexdigest(), best_seed)
+
+
+def transform_solution(solution: list, seed: int) -> list:
+    """ Transforms a solution of the puzzle into a solution of its
+    variant under the given symmetry; restore_solution in
+    portfolio_solve.py is the inverse."""
+
+    size = len(solution)
+    cells = get_layout(size, seed)[0]
+    values = [value for a_row in solution for value in a_row]
+    if seed & 8:
+        values = [size + 1 - value for value in values]
+    return [[values[cells[row * size + col]] for col in range(0, size)]
+            for row in range(0, size)]
+
+
+class SolutionCache:
+    """ The cache itself. "capacity" is the number of solutions kept in
+    memory, and "path" the file of the SQLite database that keeps them
+    on disk, if any. Puzzles without a solution are cached as well."""
+
+    COMMIT_EVERY = 64
+    # New solutions are written to disk in batches of this many; the
+    # rest are written by close
+
+    def __init__(self, capacity: int = 10000, path: str = None):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        # Canonical key -> canonical solution (None if there's none), in
+        # the order of use, the least recently used first
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = None
+        self.uncommitted = 0
+        if path != None:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS solutions "
+                    "(key TEXT PRIMARY KEY, solution TEXT)")
+
+
+    def solve(self, puzzle, constr: list = None,
+            stats: SearchStats = None) -> list:
+        """ The cached counterpart of solve in Futoshiki.py. The puzzle
+        is given as described in prepare_board. Returns the solution as
+        a size-by-size list of integers, or None if there's none. The
+        SearchStats object, if any, is only added to when the puzzle
+        isn't found in the cache and has to be solved."""
+
+        [initial_state, constr] = normalize_puzzle(puzzle, constr)
+        key, seed = canonical_form(initial_state, constr)
+        found, solution = self.get(key)
+        if found:
+            self.hits += 1
+            if solution == None:
+                return None
+            return restore_solution(solution, seed)
+
+        self.misses += 1
+        solution = solve(initial_state, constr, stats=stats)
+        if solution == None:
+            self.put(key, None)
+        else:
+            self.put(key, transform_solution(solution, seed))
+        return solution
+
+
+    def get(self, key: str) -> tuple:
+        """ Returns a tuple of whether the key is cached and the cached
+        solution, looking in memory first and on disk second."""
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return (True, self.entries[key])
+
+        if self.connection != None:
+            row = self.connection.execute(
+                    "SELECT solution FROM solutions WHERE key = ?",
+                    (key,)).fetchone()
+            if row != None:
+                solution = json.loads(row[0])
+                self.remember(key, solution)
+                return (True, solution)
+
+        return (False, None)
+
+
+    def put(self, key: str, solution: list) -> None:
+        self.remember(key, solution)
+        if self.connection != None:
+            self.connection.execute("INSERT OR REPLACE INTO solutions "
+                    "VALUES (?, ?)", (key, json.dumps(solution)))
+            self.uncommitted += 1
+            if self.uncommitted >= self.COMMIT_EVERY:
+                self.connection.commit()
+                self.uncommitted = 0
+
+
+    def remember(self, key: str, solution: list) -> None:
+        """ Keeps the solution in memory, evicting the least recently
+        used one if the cache is full."""
+
+        self.entries[key] = solution
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+
+    def close(self) -> None:
+        """ Writes the remaining solutions to disk and closes the
+        database."""
+
+        if self.connection != None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,210 @@
+""" Solves a stream of puzzles given as JSON lines, one puzzle per line,
+and writes one JSON result line per puzzle. The input is read lazily
+line by line, so arbitrarily large streams are solved without ever
+holding more than one puzzle in memory.
+
+Each input line is a JSON object with the initial state in "grid" (a
+list of rows of integers, 0 for an empty cell) and the constraint rows
+in "horizontal" (one row per board row, with the '0', '<' and '>'
+characters between horizontally-adjacent cells) and "vertical" (one row
+per pair of adjacent rows, with '0', '^' and 'v'). A constraint row may
+be given as a list of characters or as a space-separated string such as
+"0 > 0 0", and both keys may be omitted for a puzzle without
+inequalities. An optional "id" is copied to the result, e.g.
+
+    {"id": 7, "grid": [[0, 0], [0, 1]], "horizontal": ["<", "0"],
+     "vertical": ["0 0"]}
+
+produces
+
+    {"id": 7, "solution": [[1, 2], [2, 1]], "seconds": 0.0001}
+
+where "solution" is null if the puzzle has no solution. A line that
+can't be read produces {"id": ..., "error": "..."} instead. With
+--stats, every result also carries the counters of its search under
+"stats" (see SearchStats in Futoshiki.py), for spotting the puzzles
+that are slow.
+
+Usage:
+    python stream_solve.py [INPUT] [-o OUTPUT] [--cache-size N]
+            [--cache FILE] [--stats]
+
+INPUT and OUTPUT default to stdin and stdout. With --cache-size or
+--cache, the puzzles go through a SolutionCache (see solution_cache.py),
+so that repeats of a puzzle and its symmetric variants aren't searched
+again; --cache also keeps the solutions in the given SQLite file, for
+later runs."""
+
+import argparse
+import json
+import sys
+import time
+
+from Futoshiki import PuzzleFormatError, SearchStats, build_constr, solve
+
+
+def puzzle_from_json(record: dict) -> list:
+    """ Converts a decoded input line into the initial state and the list
+    of constraints, in the format returned by load_input. Raises a
+    PuzzleFormatError if the record doesn't describe a puzzle: the grid
+    must be square, its values integers from 0 to its size, and the
+    constraint rows, if given, must have the right number of rows and of
+    characters per row, as in the input files (see parse_blocks in
+    Futoshiki.py)."""
+
+    if not isinstance(record, dict) or "grid" not in record:
+        raise PuzzleFormatError("a puzzle should be an object with a " +
+                "\"grid\"", 0, "", 0)
+    initial_state = record["grid"]
+    if not isinstance(initial_state, list) or not initial_state:
+        raise PuzzleFormatError("the grid should be a non-empty list of " +
+                "rows", 0, "", 0)
+    size = len(initial_state)
+    for a_row in initial_state:
+        if not isinstance(a_row, list) or len(a_row) != size:
+            raise PuzzleFormatError("the grid should have " + str(size) +
+                    " values per row, like its number of rows", 0, "", 0)
+        for value in a_row:
+            if type(value) != int or value < 0 or value > size:
+                # type() rather than isinstance(), which lets True and
+                # False pass as 1 and 0
+                raise PuzzleFormatError("the values of a board of size " +
+                        str(size) + " are integers from 1 to " + str(size) +
+                        " (0 for an empty cell), found " + json.dumps(value),
+                        0, "", 0)
+
+    horizontal = check_rows(record, "horizontal", size, size - 1,
+            {'0', '<', '>'})
+    vertical = check_rows(record, "vertical", size - 1, size,
+            {'0', '^', 'v'})
+    return [initial_state, build_constr(size, horizontal, vertical)]
+
+
+def check_rows(record: dict, key: str, count: int, length: int,
+        allowed: set) -> list:
+    """ Works with puzzle_from_json. Returns the constraint rows under
+    the given key as lists of characters, or an empty list if the key is
+    missing (no constraints), after checking that there are "count" rows
+    of "length" characters from "allowed"."""
+
+    if key not in record:
+        return []
+    rows = record[key]
+    if not isinstance(rows, list) or len(rows) != count:
+        raise PuzzleFormatError("\"" + key + "\" should be a list of " +
+                str(count) + " rows", 0, "", 0)
+    result = []
+    for a_row in rows:
+        a_row = split_row(a_row)
+        if not isinstance(a_row, list) or len(a_row) != length:
+            raise PuzzleFormatError("every row of \"" + key + "\" should " +
+                    "have " + str(length) + " characters", 0, "", 0)
+        for character in a_row:
+            if not isinstance(character, str) or character not in allowed:
+                raise PuzzleFormatError("unexpected character " +
+                        json.dumps(character) + " in \"" + key + "\"",
+                        0, "", 0)
+        result.append(a_row)
+    return result
+
+
+def split_row(a_row) -> list:
+    """ A constraint row is either a list of characters already or a
+    string of characters separated by white space."""
+    if isinstance(a_row, str):
+        return a_row.split()
+    return a_row
+
+
+def solve_stream(lines, cache=None, with_stats: bool = False):
+    """ A generator that solves the puzzle on each non-empty line of
+    "lines" (any iterable of strings, such as an open file) and yields
+    one result dictionary per puzzle. Lines are only read as the results
+    are consumed. If a SolutionCache is given, the puzzles are solved
+    through it, and if "with_stats" is True, the SearchStats of each
+    puzzle go into its result (all zero for a puzzle found in the
+    cache)."""
+
+    solver = solve
+    if cache != None:
+        solver = cache.solve
+
+    line_number = 0
+    for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+
+        result = {"id": line_number}
+        # Puzzles without an id of their own are identified by their
+        # line number in the stream
+        start = time.perf_counter()
+        try:
+            record = json.loads(line)
+            if "id" in record:
+                result["id"] = record["id"]
+            [initial_state, constr] = puzzle_from_json(record)
+            stats = None
+            if with_stats:
+                stats = SearchStats()
+            result["solution"] = solver(initial_state, constr, stats=stats)
+            if stats != None:
+                result["stats"] = stats.as_dict()
+        except PuzzleFormatError as error:
+            result["error"] = "PuzzleFormatError: " + error.detail
+            # Without the puzzle number and line of a file, which mean
+            # nothing here
+            yield result
+            continue
+        except (ValueError, KeyError, IndexError, TypeError,
+                AttributeError) as error:
+            # json.JSONDecodeError is a subclass of ValueError
+            result["error"] = type(error).__name__ + ": " + str(error)
+            yield result
+            continue
+
+        result["seconds"] = round(time.perf_counter() - start, 6)
+        yield result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+            description="Solve a stream of Futoshiki puzzles in JSON lines.")
+    parser.add_argument("input", nargs="?", default=None,
+            help="the JSON lines file to read (default: stdin)")
+    parser.add_argument("-o", "--output", default=None,
+            help="the file to write the results to (default: stdout)")
+    parser.add_argument("--cache-size", type=int, default=None,
+            help="keep up to this many solutions in memory")
+    parser.add_argument("--cache", default=None,
+            help="keep the solutions in this SQLite file as well")
+    parser.add_argument("--stats", action="store_true",
+            help="add the search statistics of each puzzle to its result")
+    args = parser.parse_args()
+
+    cache = None
+    if args.cache_size != None or args.cache != None:
+        from solution_cache import SolutionCache
+        cache = SolutionCache(args.cache_size or 10000, args.cache)
+
+    in_stream = sys.stdin
+    out_stream = sys.stdout
+    if args.input != None:
+        in_stream = open(args.input, 'r', encoding='utf-8')
+    if args.output != None:
+        out_stream = open(args.output, 'w', encoding='utf-8')
+
+    for result in solve_stream(in_stream, cache, args.stats):
+        out_stream.write(json.dumps(result, separators=(',', ':')) + '\n')
+
+    if cache != None:
+        cache.close()
+    if args.input != None:
+        in_stream.close()
+    if args.output != None:
+        out_stream.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+""" Traces and profiles the solver on a puzzle, to find out where the time
+goes. There are two tools:
+
+- A Tracer, i.e. SearchHooks (see Futoshiki.py) that follow the search
+  event by event. It charges the time between two events to the level of
+  the search and the phase the solver was in, which it can tell from
+  the events alone: after a level is entered, the cell is being chosen
+  ("select"); after an assignment, it's being propagated ("propagate");
+  after a wipe-out or after a level below has been left, the board is
+  being restored ("undo"). The times are written as collapsed stacks,
+  one line per stack such as
+
+      solve;L1;L2;L3;propagate 1234
+
+  (the microseconds spent propagating at level 3), which flamegraph.pl
+  and speedscope turn into a flame graph. The Tracer can also write a
+  compact log of the events, one per line: the microseconds since the
+  start, a letter for the event and the level, followed by
+
+      B   the size of the board (start)
+      N   (a level has been entered)
+      A   row,col=value (an assignment, rows and columns from 0)
+      W   row,col of the cell being propagated, or - (a wipe-out)
+      S   (a solution)
+      X   the conflict set in hex (a level has been left)
+
+- profile_solve, which runs a solve under cProfile and can dump the
+  result for pstats, snakeviz and the like. cProfile sees every function
+  call, including the ones too cheap to tell apart with the Tracer, but
+  slows the solver down a good deal more.
+
+Usage:
+    python trace_solve.py INPUT [--log FILE] [--stacks FILE]
+            [--profile FILE] [--top N]
+
+Without --profile, the puzzle is solved under the Tracer, and the time
+of each phase is printed; --log and --stacks write the event log and
+the collapsed stacks ("-" for stdout). With --profile, the puzzle is
+solved under cProfile instead, the profile is dumped into the file and
+the N functions with the most cumulative time are printed."""
+
+import argparse
+import cProfile
+import pstats
+import sys
+import time
+
+from Futoshiki import (MRV, ASCENDING, SearchHooks, load_input, solve)
+
+
+PHASES = ("propagate", "select", "undo", "solution")
+# The phases the Tracer charges time to; the initial propagation is
+# charged to "propagate" at the bottom of the stack, "solve"
+
+
+class Tracer(SearchHooks):
+    """ Follows the search and charges the time between events to the
+    current stack of levels and phase (see above). If "log_stream" is
+    given (a text file or sys.stdout), every event is written to it as
+    it happens. Call finish once the solve has returned, so that the time
+    after the last event is charged as well. The time a caller of
+    iter_solutions spends holding a solution is charged to "solution"."""
+
+    def __init__(self, log_stream=None):
+        self.log_stream = log_stream
+        self.stacks = {}
+        # Collapsed stack -> seconds spent in it
+
+        self.prefixes = ["solve"]
+        # The collapsed stack of each level entered so far, the current
+        # one last
+        self.phase = "propagate"
+        self.start_time = time.perf_counter()
+        self.last = self.start_time
+        # The time of the previous event
+
+
+    def advance(self, phase: str) -> float:
+        """ Charges the time since the previous event to the current
+        stack and phase and moves on to the given phase. Returns the
+        time of the event."""
+
+        now = time.perf_counter()
+        key = self.prefixes[-1] + ";" + self.phase
+        self.stacks[key] = self.stacks.get(key, 0.0) + (now - self.last)
+        self.last = now
+        self.phase = phase
+        return now
+
+
+    def log(self, now: float, event: str, level: int,
+            detail: str = "") -> None:
+        if self.log_stream != None:
+            self.log_stream.write("%d %s %d%s\n" % (
+                round((now - self.start_time) * 1000000), event, level,
+                detail))
+
+
+    def on_start(self, a_board) -> None:
+        self.start_time = time.perf_counter()
+        self.last = self.start_time
+        self.prefixes = ["solve"]
+        self.phase = "propagate"
+        # The initial propagation
+        self.log(self.start_time, "B", 0, " " + str(a_board.size))
+
+
+    def on_node_enter(self, a_board, level: int) -> None:
+        now = self.advance("select")
+        self.prefixes.append(self.prefixes[-1] + ";L" + str(level))
+        self.log(now, "N", level)
+
+
+    def on_assign(self, a_board, level: int, a_cell, value: int) -> None:
+        now = self.advance("propagate")
+        self.log(now, "A", level, " %d,%d=%d" % (a_cell.coord[0],
+            a_cell.coord[1], value))
+
+
+    def on_wipeout(self, a_board, a_cell) -> None:
+        now = self.advance("undo")
+        if a_cell == None:
+            detail = " -"
+        else:
+            detail = " %d,%d" % a_cell.coord
+        self.log(now, "W", len(self.prefixes) - 1, detail)
+
+
+    def on_solution(self, a_board) -> None:
+        now = self.advance("solution")
+        self.log(now, "S", len(self.prefixes))
+
+
+    def on_node_exit(self, a_board, level: int, conflict: int) -> None:
+        now = self.advance("undo")
+        self.prefixes.pop()
+        # The level above goes on by undoing its own assignment
+        self.log(now, "X", level, " %x" % conflict)
+        # -1 (every level) after a solution
+
+
+    def finish(self) -> None:
+        """ Charges the time since the last event."""
+        self.advance(self.phase)
+
+
+    def phase_seconds(self) -> dict:
+        """ Returns the total time charged to each phase."""
+
+        totals = dict((phase, 0.0) for phase in PHASES)
+        for key in self.stacks:
+            phase = key[key.rindex(";") + 1:]
+            totals[phase] += self.stacks[key]
+        return totals
+
+
+    def write_stacks(self, out_stream) -> None:
+        """ Writes the collapsed stacks, with the times in whole
+        microseconds as flame graph tools expect."""
+
+        for key in sorted(self.stacks):
+            microseconds = round(self.stacks[key] * 1000000)
+            if microseconds > 0:
+                out_stream.write(key + " " + str(microseconds) + '\n')
+
+
+def trace_solve(puzzle, constr: list = None, log_stream=None,
+        heuristic: int = MRV, value_order: int = ASCENDING) -> tuple:
+    """ Solves the puzzle (given as described in prepare_board in
+    Futoshiki.py) under a Tracer. Returns a tuple of the solution (None
+    if there's none) and the finished Tracer."""
+
+    tracer = Tracer(log_stream)
+    solution = solve(puzzle, constr, heuristic, value_order, hooks=tracer)
+    tracer.finish()
+    return (solution, tracer)
+
+
+def profile_solve(puzzle, constr: list = None, filename: str = None,
+        heuristic: int = MRV, value_order: int = ASCENDING) -> tuple:
+    """ Solves the puzzle (given as described in prepare_board in
+    Futoshiki.py) under cProfile, and dumps the profile into the given
+    file, if any. Returns a tuple of the solution (None if there's none)
+    and the profile as a pstats.Stats object."""
+
+    profiler = cProfile.Profile()
+    solution = profiler.runcall(solve, puzzle, constr, heuristic,
+            value_order)
+    if filename != None:
+        profiler.dump_stats(filename)
+    return (solution, pstats.Stats(profiler))
+
+
+def open_output(filename: str):
+    """ "-" stands for stdout."""
+    if filename == "-":
+        return sys.stdout
+    return open(filename, 'w')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+            description="Trace or profile the solver on a puzzle.")
+    parser.add_argument("input", help="the input file of the puzzle")
+    parser.add_argument("--log", default=None,
+            help="write the event log into this file")
+    parser.add_argument("--stacks", default=None,
+            help="write the collapsed stacks into this file")
+    parser.add_argument("--profile", default=None,
+            help="solve under cProfile and dump the profile into this file")
+    parser.add_argument("--top", type=int, default=20,
+            help="functions to print from the profile (default: 20)")
+    args = parser.parse_args()
+
+    [initial_state, constr] = load_input(args.input)
+    if args.profile != None:
+        solution, profile = profile_solve(initial_state, constr,
+                args.profile)
+        profile.sort_stats("cumulative").print_stats(args.top)
+        return 0 if solution != None else 1
+
+    log_stream = None
+    if args.log != None:
+        log_stream = open_output(args.log)
+    solution, tracer = trace_solve(initial_state, constr, log_stream)
+    if log_stream != None and log_stream != sys.stdout:
+        log_stream.close()
+    if args.stacks != None:
+        out_stream = open_output(args.stacks)
+        tracer.write_stacks(out_stream)
+        if out_stream != sys.stdout:
+            out_stream.close()
+
+    totals = tracer.phase_seconds()
+    total = sum(totals.values())
+    for phase in PHASES:
+        print("%-10s %10.6f s %6.1f%%" % (phase, totals[phase],
+            100 * totals[phase] / total if total > 0 else 0))
+    if solution == None:
+        print("There's no solution to this puzzle.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())